@@ -1,5 +1,6 @@
 from flask import Flask
 from flask_migrate import Migrate
+from flask_compress import Compress
 from flask_seeder import FlaskSeeder
 
 from config import Config
@@ -21,6 +22,9 @@ def create_app(env=None):
     if env == MIGRATION_ENV:
         return app
 
+    # gzip/br for the API and the dashboard, negotiated per request
+    Compress(app)
+
     from .routes import api
 
     app.register_blueprint(api.api_bp)
@@ -1 +1,43 @@
-setTimeout(function () { location.reload(); }, 300000);
\ No newline at end of file
+// New reports are appended to the history graph, the page is never re-rendered
+function extendHistory(event) {
+  var delta = JSON.parse(event.data);
+  var graph = document.querySelector('#history .js-plotly-plot');
+  if (!graph || !window.Plotly) {
+    return;
+  }
+
+  // Traces of the history graph: 0 forecasts, 1 real reports
+  [delta.forecast, delta.observed].forEach(function (points, trace) {
+    var x = graph.data[trace].x;
+    var last = x.length > 0 ? x[x.length - 1] : '';
+    var update = { x: [[]], y: [[]] };
+
+    points.x.forEach(function (date, i) {
+      if (date > last) {
+        update.x[0].push(date);
+        update.y[0].push(points.y[i]);
+      }
+    });
+
+    if (update.x[0].length > 0) {
+      Plotly.extendTraces(graph, update, [trace]);
+    }
+  });
+}
+
+function reloadLater() {
+  setTimeout(function () { location.reload(); }, 300000);
+}
+
+if (window.EventSource) {
+  var source = new EventSource('/api/forecast/stream');
+  source.addEventListener('forecast', extendHistory);
+  // A 503 (too many open streams) closes the source for good
+  source.addEventListener('error', function () {
+    if (source.readyState === EventSource.CLOSED) {
+      reloadLater();
+    }
+  });
+} else {
+  reloadLater();
+}
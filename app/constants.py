@@ -1 +1,8 @@
-MIGRATION_ENV = 'MIGRATION'
\ No newline at end of file
+import os
+
+MIGRATION_ENV = 'MIGRATION'
+
+TMP_DIR = f"{os.path.abspath(os.getcwd())}/tmp"
+
+# ICAO codes of the forecasted stations, the first one is shown on the dashboard
+STATIONS = os.getenv('STATIONS', 'SKBQ').split(',')
@@ -1,17 +1,23 @@
+import io
 import os
+import json
 from datetime import timedelta
 
 import dash
-import plotly.express as px
 import dash_core_components as dcc
 import dash_html_components as html
 
-from plotly.subplots import make_subplots
+from plotly.utils import PlotlyJSONEncoder
+from sqlalchemy import func
 
-import pandas as pd
-
-from app.database import db, Report, ModelData
+from app.constants import STATIONS
+from app.database import db, Report, ModelData, ForecastHistory
 from app.services.s3 import get_file
+from app.services.http import get
+from app.services.artifacts import get_artifact
+from app.services.archive import read_report
+from app.services.metrics import span, DASHBOARD_CACHE
+from .cache import RenderCache
 
 
 def create_dashboard(server):
@@ -21,7 +27,9 @@ def create_dashboard(server):
         server=server,
         routes_pathname_prefix='/dashboard/',
         title=title,
-        assets_folder='./assets'
+        assets_folder='./assets',
+        # Flask-Compress is set up by create_app
+        compress=False
     )
 
     dash_app.layout = html.Div([
@@ -29,7 +37,20 @@ def create_dashboard(server):
         html.Div(id='page-content')
     ], id='body')
 
+    render_cache = RenderCache(server.config['DASHBOARD_CACHE_SIZE'], server.config['DASHBOARD_CACHE_PATH'])
+
+    def index_page_key():
+        '''The page only changes when a report finishes or the training data is updated'''
+        last_report_id = db.session.query(func.max(Report.id)) \
+            .filter((Report.station == STATIONS[0]) & (Report.active == False) & (Report.path != None)).scalar()
+        train_data_updated = db.session.query(ModelData.updated).filter(ModelData.path == 'data/train_data.csv').scalar()
+        return f"index:{last_report_id}:{train_data_updated}"
+
     def build_index_page():
+        # pandas and plotly express are only needed to render, not to boot the app
+        import pandas as pd
+        import plotly.express as px
+
         children = [
             html.Div(
                 [
@@ -50,11 +71,17 @@ def create_dashboard(server):
             ),
         ]
 
-        last_report = db.session.query(Report).filter((Report.active == False) & (Report.path != None)).order_by(Report.id.desc()).first()
+        station = STATIONS[0]
+        last_report = db.session.query(Report).filter((Report.station == station) & (Report.active == False) & (Report.path != None)).order_by(Report.id.desc()).first()
 
         if last_report is not None:
-            last_report_url = get_file(last_report)
-            df = pd.read_csv(last_report_url)
+            if last_report.path.endswith('.csv'):
+                # Reports from before the Parquet archive
+                last_report_url = get_file(last_report)
+                df = pd.read_csv(io.BytesIO(get(last_report_url).content))
+            else:
+                last_report_url = f"/api/reports/{last_report.id}.csv"
+                df = read_report(last_report)
 
             df['air'] = df['air'] - 273.15
             df['date'] = pd.to_datetime(df.date) - timedelta(hours=5)
@@ -84,40 +111,26 @@ def create_dashboard(server):
                 })
             )
 
-        last_reports = db.session.query(Report).filter((Report.active == False) & (Report.path != None)).order_by(Report.id.desc()).all()
-
-        data = None
-        forecasts = []
-        for report in last_reports:
-            report_df = pd.read_csv(get_file(report))
-            forecasts.append([report.created, report.forecast])
-            if data is None:
-                data = report_df
-            else:
-                data = data.append(report_df)
-
-        if data is not None:
-            forecast_df = pd.DataFrame(data=forecasts, columns=['date', 'air'])
-
-            forecast_df['data'] = pd.to_datetime(forecast_df.date)
-            data['date'] = pd.to_datetime(data.date)
-
-            data = data.drop_duplicates()
-
-            data = data.sort_values(by='date')
-            forecast_df = forecast_df.sort_values(by='date')
+        history = db.session.query(ForecastHistory.date, ForecastHistory.air, ForecastHistory.forecast) \
+            .filter(ForecastHistory.station == station).order_by(ForecastHistory.date).all()
 
-            forecast_df['date'] = forecast_df['date'] - timedelta(hours=6)
-            forecast_df['air'] = forecast_df['air'] - 273.15
+        if len(history) > 0:
+            data = pd.DataFrame(history, columns=['date', 'air', 'forecast'])
+            data[['air', 'forecast']] = data[['air', 'forecast']].astype(float)
 
-            data['date'] = data['date'] - timedelta(hours=5)
+            data['date'] = pd.to_datetime(data.date) - timedelta(hours=5)
             data['air'] = data['air'] - 273.15
+            data['forecast'] = data['forecast'] - 273.15
 
-            trace_1 = {'x': data['date'], 'y': data['air'], 'type':'line', 'xaxis': 'x1', 'yaxis': 'y1', 'name': 'Real reports'}
-            trace_2 = {'x': forecast_df['date'], 'y': forecast_df['air'], 'type':'line', 'xaxis': 'x1', 'yaxis': 'y1', 'name': 'Forecasts'}
+            observed = data.dropna(subset=['air'])
+            forecasts = data.dropna(subset=['forecast'])
 
+            trace_1 = {'x': observed['date'], 'y': observed['air'], 'type':'line', 'xaxis': 'x1', 'yaxis': 'y1', 'name': 'Real reports'}
+            trace_2 = {'x': forecasts['date'], 'y': forecasts['forecast'], 'type':'line', 'xaxis': 'x1', 'yaxis': 'y1', 'name': 'Forecasts'}
+
+            # Extended in the browser by the forecast stream (assets/index.js)
             children.append(dcc.Graph(
-                id='subplot',
+                id='history',
                 figure = {
                     'data': [trace_2, trace_1],
                     'layout': {
@@ -134,7 +147,7 @@ def create_dashboard(server):
         children.append(html.Div(style={'display': 'flex', 'justify-content': 'center', 'margin-top': '24px'},
             children=html.A(children=f"Download training data", href=training_data_url, download=True)))
 
-        training_data = pd.read_csv(training_data_url)
+        training_data = pd.read_csv(get_artifact(train_data_db))
         training_data['air'] = training_data['air'] - 273.15
 
         fig = px.line(training_data, x='date', y='air', title='Training data')
@@ -149,7 +162,16 @@ def create_dashboard(server):
                 [dash.dependencies.Input('url', 'pathname')])
     def display_page(pathname):
         if pathname == '/dashboard/' or pathname == '/dashboard' or pathname == '':
-            return build_index_page()
+            key = index_page_key()
+            page = render_cache.get(key)
+            if page is None:
+                DASHBOARD_CACHE.labels('miss').inc()
+                with span('dashboard_render'):
+                    page = json.dumps(build_index_page(), cls=PlotlyJSONEncoder)
+                render_cache.set(key, page)
+            else:
+                DASHBOARD_CACHE.labels('hit').inc()
+            return json.loads(page)
         else:
             return html.H3('URL Error!')
 
@@ -0,0 +1,50 @@
+import os
+import sqlite3
+import time
+from threading import Lock
+
+from cachetools import LRUCache
+
+
+class RenderCache:
+    '''In-memory LRU cache of serialized pages, optionally backed by a SQLite
+    file so every gunicorn worker can reuse a page rendered by another one'''
+
+    def __init__(self, maxsize, path=None):
+        self.memory = LRUCache(maxsize=maxsize)
+        self.maxsize = maxsize
+        self.path = path
+        self.lock = Lock()
+
+        if self.path is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with self.connect() as conn:
+                conn.execute('CREATE TABLE IF NOT EXISTS render_cache (key TEXT PRIMARY KEY, value TEXT, created REAL)')
+
+    def connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, key):
+        with self.lock:
+            value = self.memory.get(key)
+        if value is not None or self.path is None:
+            return value
+
+        with self.connect() as conn:
+            row = conn.execute('SELECT value FROM render_cache WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+
+        with self.lock:
+            self.memory[key] = row[0]
+        return row[0]
+
+    def set(self, key, value):
+        with self.lock:
+            self.memory[key] = value
+        if self.path is None:
+            return
+
+        with self.connect() as conn:
+            conn.execute('INSERT OR REPLACE INTO render_cache (key, value, created) VALUES (?, ?, ?)', (key, value, time.time()))
+            conn.execute('DELETE FROM render_cache WHERE key NOT IN (SELECT key FROM render_cache ORDER BY created DESC LIMIT ?)', (self.maxsize,))
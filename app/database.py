@@ -8,18 +8,43 @@ db = SQLAlchemy()
 @dataclass
 class Report(db.Model):
     id: int
+    station: str
     forecast: float
+    horizon_start: str
+    horizon: list
+    scenarios: dict
     active: bool
     path: str
     url: str
+    url_expires: str
+    slot: str
+    claimed: str
+    worker: str
     created: str
     updated: str
 
+    __table_args__ = (
+        db.Index('ix_report_slot_station', 'slot', 'station', unique=True),
+        # Queue claims and the finished report lookups, newest first
+        db.Index('ix_report_active_id', 'active', 'id'),
+        db.Index('ix_report_station_active_id', 'station', 'active', 'id'),
+        # MAX(updated) is the ETag of the forecast API
+        db.Index('ix_report_updated', 'updated'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
+    station = db.Column(db.String(8), nullable=False, default='SKBQ', server_default='SKBQ')
     path = db.Column(db.String(512), nullable=True)
     url = db.Column(db.String(512), nullable=True)
+    url_expires = db.Column(db.DateTime, nullable=True)
     forecast = db.Column(db.Float, nullable=True)
+    horizon_start = db.Column(db.DateTime, nullable=True)
+    horizon = db.Column(db.JSON, nullable=True)
+    scenarios = db.Column(db.JSON, nullable=True)
     active = db.Column(db.Boolean, default=True, nullable=False)
+    slot = db.Column(db.DateTime, nullable=True)
+    claimed = db.Column(db.DateTime, nullable=True)
+    worker = db.Column(db.String(128), nullable=True)
     created = db.Column(db.DateTime, default=datetime.utcnow)
     updated = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -29,11 +54,72 @@ class ModelData(db.Model):
     id: int
     path: str
     url: str
+    url_expires: str
+    etag: str
+    name: str
+    version: int
+    score: float
     created: str
     updated: str
 
+    # Registry entries, one row per (name, version). Rows without a name are
+    # the source files (keras model, scaler, training data)
+    __table_args__ = (db.Index('ix_model_data_name_version', 'name', 'version', unique=True),)
+
     id = db.Column(db.Integer, primary_key=True)
-    path = db.Column(db.String(512), nullable=True)
+    path = db.Column(db.String(512), nullable=True, unique=True, index=True)
     url = db.Column(db.String(512), nullable=True)
+    url_expires = db.Column(db.DateTime, nullable=True)
+    etag = db.Column(db.String(64), nullable=True)
+    name = db.Column(db.String(64), nullable=True)
+    # Promoted model version and its validation error (MSE, scaled)
+    version = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    score = db.Column(db.Float, nullable=True)
     created = db.Column(db.DateTime, default=datetime.utcnow)
-    updated = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
\ No newline at end of file
+    updated = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+@dataclass
+class Observation(db.Model):
+    id: int
+    station: str
+    date: str
+    air: float
+    metar: str
+    created: str
+
+    __table_args__ = (db.Index('ix_observation_station_date', 'station', 'date', unique=True),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    station = db.Column(db.String(8), nullable=False, default='SKBQ', server_default='SKBQ')
+    date = db.Column(db.DateTime, nullable=False)
+    air = db.Column(db.Float, nullable=False)
+    metar = db.Column(db.String(512), nullable=True)
+    created = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+@dataclass
+class ForecastHistory(db.Model):
+    id: int
+    station: str
+    date: str
+    air: float
+    forecast: float
+    report_id: int
+
+    __table_args__ = (db.Index('ix_forecast_history_station_date', 'station', 'date', unique=True),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    station = db.Column(db.String(8), nullable=False, default='SKBQ', server_default='SKBQ')
+    date = db.Column(db.DateTime, nullable=False)
+    air = db.Column(db.Float, nullable=True)
+    forecast = db.Column(db.Float, nullable=True)
+    report_id = db.Column(db.Integer, db.ForeignKey('report.id'), nullable=True)
+
+
+@dataclass
+class Counter(db.Model):
+    name: str
+    value: int
+
+    name = db.Column(db.String(64), primary_key=True)
+    value = db.Column(db.Integer, default=0, nullable=False)
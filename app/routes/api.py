@@ -1,14 +1,181 @@
-from flask import Blueprint, jsonify, redirect
+import os
+import hashlib
+from functools import wraps
+from datetime import datetime, timedelta
+
+from flask import Blueprint, Response, jsonify, redirect, request, abort, current_app
+from sqlalchemy import func
 
 from .. import app
-from ..services.get_real_time_obs import run
+from ..constants import STATIONS
+from ..database import db, Report, ForecastHistory
+from ..services.worker import enqueue
+from ..services.stream import events
+from ..services.archive import read_report
+from ..services.metrics import render
+
+# Seconds a client may reuse a read-only API response before revalidating
+API_MAX_AGE = int(os.getenv('API_MAX_AGE', 60))
+HISTORY_DAYS = 7
 
 api_bp = Blueprint('api_bp', __name__)
 
+
+def conditional(version=lambda: ()):
+  '''ETag derived from the last Report.updated, the request URL and the
+  values returned by version, checked before the view runs so a 304 costs a
+  few small queries'''
+  def decorator(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+      updated = db.session.query(func.max(Report.updated)).scalar()
+      key = ':'.join(str(value) for value in (request.full_path, updated) + tuple(version()))
+      etag = hashlib.md5(key.encode()).hexdigest()
+
+      if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+      else:
+        response = view(*args, **kwargs)
+
+      # Weak, the compressed bodies differ byte by byte
+      response.set_etag(etag, weak=True)
+      response.cache_control.public = True
+      response.cache_control.max_age = API_MAX_AGE
+      return response
+    return wrapper
+  return decorator
+
+
+def parse_date(name, default):
+  value = request.args.get(name)
+  if value is None:
+    return default
+  try:
+    return datetime.fromisoformat(value)
+  except ValueError:
+    abort(400, f"invalid {name} date: {value}")
+
+
+def last_report(station):
+  return db.session.query(Report) \
+    .filter((Report.station == station) & (Report.active == False) & (Report.horizon_start != None)) \
+    .order_by(Report.id.desc()).first()
+
+
+def horizon_dates(report):
+  return [(report.horizon_start + timedelta(hours=hour)).isoformat() for hour in range(len(report.horizon))]
+
 @api_bp.route('/fetch')
 def fetch():
-  status, report = run()
-  return jsonify({'status': status, 'report': report})
+  status, reports = enqueue()
+  return jsonify({'status': status, 'report': reports[0], 'reports': reports})
+
+
+@api_bp.route('/api/forecast/horizon')
+@conditional()
+def forecast_horizon():
+  '''Hourly forecast of the last finished report of a station, or of the
+  report given by ?report=<id>'''
+  if request.args.get('report') is not None:
+    report = db.session.query(Report) \
+      .filter((Report.id == request.args.get('report', type=int)) & (Report.horizon_start != None)).first()
+  else:
+    report = last_report(request.args.get('station', STATIONS[0]))
+
+  if report is None:
+    abort(404)
+
+  return jsonify({
+    'report': report.id,
+    'station': report.station,
+    'dates': horizon_dates(report),
+    'horizon': report.horizon,
+    'scenarios': report.scenarios or {},
+  })
+
+
+@api_bp.route('/api/forecast/latest')
+@conditional()
+def forecast_latest():
+  '''Next hour forecast (Kelvin) of the last finished report of a station'''
+  report = last_report(request.args.get('station', STATIONS[0]))
+  if report is None:
+    abort(404)
+
+  return jsonify({
+    'report': report.id,
+    'station': report.station,
+    'date': report.horizon_start.isoformat(),
+    'forecast': report.forecast,
+    'dates': horizon_dates(report),
+    'horizon': report.horizon,
+    'updated': report.updated.isoformat(),
+  })
+
+
+def history_window():
+  '''Station and [from, to] of a history request. The default window ends
+  at the next hour, so it moves once per hour'''
+  station = request.args.get('station', STATIONS[0])
+  end = parse_date('to', datetime.utcnow().replace(minute=0, second=0, microsecond=0) + timedelta(hours=1))
+  start = parse_date('from', end - timedelta(days=HISTORY_DAYS))
+  return station, start, end
+
+
+def history_version():
+  # History rows are added by jobs and the default window is relative to now
+  last = db.session.query(func.max(ForecastHistory.id)).scalar()
+  return (last,) + history_window()[1:]
+
+
+@api_bp.route('/api/forecast/history')
+@conditional(history_version)
+def forecast_history():
+  '''Observed and forecast air temperature (Kelvin) per hour of a station
+  between ?from= and ?to= (ISO dates, the last HISTORY_DAYS and the next
+  hour forecast by default)'''
+  station, start, end = history_window()
+
+  history = db.session.query(ForecastHistory.date, ForecastHistory.air, ForecastHistory.forecast) \
+    .filter((ForecastHistory.station == station) & (ForecastHistory.date >= start) & (ForecastHistory.date <= end)) \
+    .order_by(ForecastHistory.date).all()
+
+  return jsonify({
+    'station': station,
+    'from': start.isoformat(),
+    'to': end.isoformat(),
+    'history': [{'date': date.isoformat(), 'air': air, 'forecast': forecast} for date, air, forecast in history],
+  })
+
+
+@api_bp.route('/api/reports/<int:report_id>.csv')
+def report_csv(report_id):
+  '''Observations of a report read from the Parquet archive'''
+  report = db.session.query(Report).filter((Report.id == report_id) & (Report.horizon_start != None)).first()
+  if report is None:
+    abort(404)
+
+  return Response(read_report(report).to_csv(index=False), mimetype='text/csv',
+    headers={'Content-Disposition': f"attachment; filename={report.station}-{report.horizon_start:%Y%m%d%H}.csv"})
+
+
+@api_bp.route('/api/forecast/stream')
+def forecast_stream():
+  '''Server-Sent Events with the new points of each finished report'''
+  station = request.args.get('station', STATIONS[0])
+  stream = events(station, current_app._get_current_object())
+  if stream is None:
+    # The dashboard falls back to reloading the page
+    return Response('too many open streams', status=503, headers={'Retry-After': '30'})
+  return Response(stream, mimetype='text/event-stream',
+    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@api_bp.route('/metrics')
+def metrics():
+  '''Prometheus metrics summed over every process of this host'''
+  body, content_type = render()
+  return Response(body, content_type=content_type)
 
 
 @api_bp.route('/')
@@ -0,0 +1,185 @@
+import os
+import uuid
+from datetime import datetime, timedelta
+
+from app.constants import TMP_DIR
+from app.services.s3 import AWS_BUCKET_NAME, get_client
+from app.services.metrics import S3_BYTES
+
+# s3://bucket/prefix or a local directory, the local backend has the same layout
+ARCHIVE_URL = os.getenv('ARCHIVE_URL') or (f"s3://{AWS_BUCKET_NAME}/archive" if AWS_BUCKET_NAME else f"{TMP_DIR}/archive")
+# Hourly fragments of a partition merged into one file by compact()
+ARCHIVE_COMPACT_FRAGMENTS = int(os.getenv('ARCHIVE_COMPACT_FRAGMENTS', 24))
+
+FRAGMENT_PREFIX = 'part-'
+COMPACTED_PREFIX = 'compacted-'
+
+archive = None
+
+
+def get_archive():
+    '''(pyarrow filesystem, root path), pyarrow is imported on first use. S3
+    goes through the shared boto3 client, see app.services.archive_s3'''
+    global archive
+
+    if archive is None:
+        from pyarrow import fs
+
+        if ARCHIVE_URL.startswith('s3://'):
+            from app.services.archive_s3 import S3Handler
+
+            filesystem = fs.PyFileSystem(S3Handler(get_client()))
+            root = ARCHIVE_URL[len('s3://'):]
+        else:
+            filesystem = fs.LocalFileSystem()
+            root = os.path.abspath(ARCHIVE_URL)
+        archive = (filesystem, root)
+    return archive
+
+
+def schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ('report_id', pa.int64()),
+        ('date', pa.timestamp('ms')),
+        ('air', pa.float64()),
+        ('forecast', pa.float64()),
+    ])
+
+
+def partition_path(root, station, month):
+    return f"{root}/station={station}/month={month}"
+
+
+def write_table(filesystem, path, table):
+    import pyarrow.parquet as pq
+
+    with filesystem.open_output_stream(path) as f:
+        pq.write_table(table, f)
+        if ARCHIVE_URL.startswith('s3://'):
+            S3_BYTES.labels('upload').inc(f.tell())
+
+
+def list_files(filesystem, path):
+    from pyarrow import fs
+
+    infos = filesystem.get_file_info(fs.FileSelector(path, recursive=True, allow_not_found=True))
+    return sorted(info.path for info in infos if info.type == fs.FileType.File and info.path.endswith('.parquet'))
+
+
+def append_report(df, forecast, report_id, station):
+    '''Write the observed rows of a report and its forecast row as an hourly
+    fragment of the station/month partition, split in two when the rows
+    cross a month. Returns the partition of the forecast row relative to the
+    archive root, fragments are deleted once the partition is compacted'''
+    import pyarrow as pa
+
+    filesystem, root = get_archive()
+    forecast_date = df['date'].iloc[-1].to_pydatetime() + timedelta(hours=1)
+
+    rows = report_rows(df, forecast, report_id, forecast_date)
+    for month in sorted(set(date.strftime('%Y-%m') for date in rows['date'])):
+        selected = [i for i, date in enumerate(rows['date']) if date.strftime('%Y-%m') == month]
+        table = pa.Table.from_pydict({column: [values[i] for i in selected] for column, values in rows.items()}, schema=schema())
+
+        partition = partition_path(root, station, month)
+        filesystem.create_dir(partition, recursive=True)
+        path = f"{partition}/{FRAGMENT_PREFIX}{forecast_date:%Y%m%d%H}-{report_id}.parquet"
+        write_table(filesystem, path, table)
+
+        fragments = [file for file in list_files(filesystem, partition) if os.path.basename(file).startswith(FRAGMENT_PREFIX)]
+        if len(fragments) >= ARCHIVE_COMPACT_FRAGMENTS:
+            compact_partition(filesystem, partition)
+
+    return partition_path(root, station, f"{forecast_date:%Y-%m}")[len(root) + 1:]
+
+
+def report_rows(df, forecast, report_id, forecast_date):
+    '''Archive columns of a report DataFrame (date, air) and its forecast'''
+    dates = [date.to_pydatetime() for date in df['date']] + [forecast_date]
+    return {
+        'report_id': [report_id] * len(dates),
+        'date': dates,
+        'air': [float(air) for air in df['air']] + [None],
+        'forecast': [None] * df.shape[0] + [float(forecast)],
+    }
+
+
+def compact_partition(filesystem, partition):
+    '''Merge every file of a partition into one date sorted file. The new file
+    is written before the old ones are deleted, a reader in between may see
+    rows twice but never misses one'''
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    files = list_files(filesystem, partition)
+    if len(files) < 2:
+        return 0
+
+    tables = []
+    for file in files:
+        with filesystem.open_input_file(file) as f:
+            tables.append(pq.read_table(f, columns=schema().names))
+    df = pa.concat_tables(tables).to_pandas().sort_values(by=['date', 'report_id'])
+    table = pa.Table.from_pandas(df, schema=schema(), preserve_index=False)
+
+    write_table(filesystem, f"{partition}/{COMPACTED_PREFIX}{datetime.utcnow():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:8]}.parquet", table)
+    for file in files:
+        filesystem.delete_file(file)
+
+    print('[archive]: compacted', partition, len(files))
+    return len(files)
+
+
+def compact(station=None):
+    '''Compact every partition, or the ones of a station'''
+    from pyarrow import fs
+
+    filesystem, root = get_archive()
+    stations = [station] if station is not None else [
+        info.base_name.split('=', 1)[1]
+        for info in filesystem.get_file_info(fs.FileSelector(root, allow_not_found=True))
+        if info.type == fs.FileType.Directory and info.base_name.startswith('station=')
+    ]
+
+    compacted = 0
+    for station in stations:
+        selector = fs.FileSelector(f"{root}/station={station}", allow_not_found=True)
+        for info in filesystem.get_file_info(selector):
+            if info.type == fs.FileType.Directory:
+                compacted += compact_partition(filesystem, info.path)
+    return compacted
+
+
+def read_archive(station, start, end, report_id=None, columns=None):
+    '''Rows of a station with start <= date <= end as a DataFrame. Files of
+    the months outside the range are never opened and the date filter is
+    pushed down to the Parquet row group statistics'''
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    from pyarrow import fs
+
+    columns = columns or schema().names
+    filesystem, root = get_archive()
+
+    path = f"{root}/station={station}"
+    if filesystem.get_file_info(path).type == fs.FileType.NotFound:
+        return schema().empty_table().to_pandas()[columns]
+
+    dataset = ds.dataset(path, filesystem=filesystem, format='parquet',
+                         partitioning=ds.partitioning(pa.schema([('month', pa.string())]), flavor='hive'))
+
+    predicate = (ds.field('month') >= f"{start:%Y-%m}") & (ds.field('month') <= f"{end:%Y-%m}") & \
+        (ds.field('date') >= start) & (ds.field('date') <= end)
+    if report_id is not None:
+        predicate = predicate & (ds.field('report_id') == report_id)
+
+    return dataset.to_table(columns=columns, filter=predicate).to_pandas()
+
+
+def read_report(report):
+    '''Observed rows (date, air) of one report'''
+    df = read_archive(report.station, report.horizon_start - timedelta(days=1), report.horizon_start,
+                      report_id=report.id, columns=['date', 'air'])
+    return df.dropna(subset=['air']).sort_values(by='date').reset_index(drop=True)
@@ -0,0 +1,137 @@
+import io
+
+import pyarrow as pa
+from pyarrow import fs
+
+from app.services.metrics import S3_BYTES
+
+
+def split_path(path):
+    bucket, _, key = path.strip('/').partition('/')
+    return bucket, key
+
+
+class Upload(io.BytesIO):
+    '''Buffered archive file, uploaded with one put_object on close'''
+
+    def __init__(self, client, bucket, key):
+        super().__init__()
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+
+    def close(self):
+        if not self.closed:
+            self.client.put_object(Bucket=self.bucket, Key=self.key, Body=self.getvalue())
+        super().close()
+
+
+class S3Handler(fs.FileSystemHandler):
+    '''pyarrow filesystem over the boto3 client of app.services.s3, so the
+    archive gets its timeouts, retries and region redirects. Paths are
+    bucket/key, directories are key prefixes. Archive files are small, they
+    are read and written whole'''
+
+    def __init__(self, client):
+        self.client = client
+
+    def get_type_name(self):
+        return 'boto3-s3'
+
+    def normalize_path(self, path):
+        return path
+
+    def __eq__(self, other):
+        return isinstance(other, S3Handler) and other.client is self.client
+
+    def __ne__(self, other):
+        return not self == other
+
+    def get_file_info(self, paths):
+        return [self.file_info(path) for path in paths]
+
+    def file_info(self, path):
+        bucket, key = split_path(path)
+        if key == '':
+            return fs.FileInfo(path, fs.FileType.Directory)
+        try:
+            head = self.client.head_object(Bucket=bucket, Key=key)
+            return fs.FileInfo(path, fs.FileType.File, size=head['ContentLength'], mtime=head['LastModified'])
+        except self.client.exceptions.ClientError as e:
+            if e.response['Error']['Code'] not in ('404', 'NoSuchKey', 'NotFound'):
+                raise
+
+        listed = self.client.list_objects_v2(Bucket=bucket, Prefix=f"{key}/", MaxKeys=1)
+        return fs.FileInfo(path, fs.FileType.Directory if listed.get('KeyCount', 0) > 0 else fs.FileType.NotFound)
+
+    def get_file_info_selector(self, selector):
+        bucket, key = split_path(selector.base_dir)
+        prefix = f"{key}/" if key != '' else ''
+        arguments = {'Bucket': bucket, 'Prefix': prefix}
+        if not selector.recursive:
+            arguments['Delimiter'] = '/'
+
+        infos, directories = [], set()
+        for page in self.client.get_paginator('list_objects_v2').paginate(**arguments):
+            for common in page.get('CommonPrefixes', []):
+                directories.add(common['Prefix'].rstrip('/'))
+            for item in page.get('Contents', []):
+                infos.append(fs.FileInfo(f"{bucket}/{item['Key']}", fs.FileType.File, size=item['Size'], mtime=item['LastModified']))
+                # Recursive listings have no common prefixes, the keys imply them
+                parts = item['Key'][len(prefix):].split('/')[:-1]
+                for depth in range(len(parts)):
+                    directories.add(prefix + '/'.join(parts[:depth + 1]))
+
+        if len(infos) == 0 and len(directories) == 0 and not selector.allow_not_found \
+                and self.file_info(selector.base_dir).type == fs.FileType.NotFound:
+            raise FileNotFoundError(selector.base_dir)
+        return infos + [fs.FileInfo(f"{bucket}/{directory}", fs.FileType.Directory) for directory in sorted(directories)]
+
+    def create_dir(self, path, recursive):
+        # Prefixes exist as soon as a key is written under them
+        pass
+
+    def delete_dir(self, path):
+        self.delete_dir_contents(path)
+
+    def delete_dir_contents(self, path, missing_dir_ok=False):
+        selector = fs.FileSelector(path, recursive=True, allow_not_found=True)
+        for info in self.get_file_info_selector(selector):
+            if info.type == fs.FileType.File:
+                self.delete_file(info.path)
+
+    def delete_root_dir_contents(self):
+        raise NotImplementedError('refusing to empty a bucket')
+
+    def delete_file(self, path):
+        bucket, key = split_path(path)
+        self.client.delete_object(Bucket=bucket, Key=key)
+
+    def copy_file(self, src, dest):
+        bucket, key = split_path(src)
+        dest_bucket, dest_key = split_path(dest)
+        self.client.copy_object(Bucket=dest_bucket, Key=dest_key, CopySource={'Bucket': bucket, 'Key': key})
+
+    def move(self, src, dest):
+        self.copy_file(src, dest)
+        self.delete_file(src)
+
+    def open_input_file(self, path):
+        bucket, key = split_path(path)
+        body = self.client.get_object(Bucket=bucket, Key=key)['Body']
+        try:
+            data = body.read()
+        finally:
+            body.close()
+        S3_BYTES.labels('download').inc(len(data))
+        return pa.BufferReader(data)
+
+    def open_input_stream(self, path):
+        return self.open_input_file(path)
+
+    def open_output_stream(self, path, metadata):
+        bucket, key = split_path(path)
+        return pa.PythonFile(Upload(self.client, bucket, key), mode='w')
+
+    def open_append_stream(self, path, metadata):
+        raise NotImplementedError('S3 objects cannot be appended to')
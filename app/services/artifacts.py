@@ -0,0 +1,110 @@
+import os
+import fcntl
+import shutil
+import hashlib
+from contextlib import contextmanager
+
+from app.constants import TMP_DIR
+from app.database import db
+from app.services.s3 import get_file, get_etag, upload_file
+from app.services.http import download
+from app.services.metrics import span, S3_BYTES
+
+ARTIFACTS_DIR = f"{TMP_DIR}/artifacts"
+ARTIFACTS_MAX_SIZE = int(os.getenv('ARTIFACTS_MAX_SIZE', 512 * 1024 * 1024))
+
+
+def file_hash(path):
+    md5 = hashlib.md5()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            md5.update(chunk)
+    return md5.hexdigest()
+
+
+@contextmanager
+def file_lock(path):
+    '''Exclusive lock shared by every process on this host'''
+    with open(path, 'w') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def artifact_path(model_data):
+    return f"{ARTIFACTS_DIR}/{model_data.etag}-{os.path.basename(model_data.path)}"
+
+
+def get_artifact(model_data):
+    '''Local copy of a ModelData object, downloaded once per content hash and
+    reused across workers and restarts. A stale copy is detected by comparing
+    the recorded hash, without downloading the object'''
+    os.makedirs(ARTIFACTS_DIR, exist_ok=True)
+
+    if model_data.etag is None:
+        model_data.etag = get_etag(model_data.path)
+        db.session.commit()
+
+    path = artifact_path(model_data)
+    with file_lock(f"{path}.lock"):
+        if os.path.exists(path):
+            # mtime drives the LRU eviction
+            os.utime(path)
+            return path
+
+        part_path = f"{path}.part"
+        with span('s3_download'):
+            size = download(get_file(model_data), part_path)
+        S3_BYTES.labels('download').inc(size)
+
+        # Multipart ETags are not a content md5 and can't be verified
+        if '-' not in model_data.etag and file_hash(part_path) != model_data.etag:
+            os.remove(part_path)
+            raise ValueError(f"checksum mismatch for {model_data.path}")
+
+        os.replace(part_path, path)
+
+    evict_artifacts(keep=path)
+    return path
+
+
+def publish_artifact(model_data, path):
+    '''Upload a new version of a ModelData object and record its hash, the
+    local file is moved into the cache so this host never downloads it'''
+    folder, filename = os.path.split(model_data.path)
+    if upload_file(folder, filename, path) is None:
+        return None
+
+    model_data.etag = file_hash(path)
+    os.makedirs(ARTIFACTS_DIR, exist_ok=True)
+    with file_lock(f"{artifact_path(model_data)}.lock"):
+        shutil.copyfile(path, artifact_path(model_data))
+    db.session.commit()
+
+    evict_artifacts(keep=artifact_path(model_data))
+    return model_data.etag
+
+
+def evict_artifacts(keep=None):
+    '''Remove the least recently used artifacts above ARTIFACTS_MAX_SIZE'''
+    artifacts = []
+    for name in os.listdir(ARTIFACTS_DIR):
+        path = f"{ARTIFACTS_DIR}/{name}"
+        if name.endswith('.lock') or name.endswith('.part') or path == keep:
+            continue
+        stat = os.stat(path)
+        artifacts.append((stat.st_mtime, stat.st_size, path))
+
+    size = sum(artifact[1] for artifact in artifacts)
+    if keep is not None and os.path.exists(keep):
+        size += os.path.getsize(keep)
+
+    for _, artifact_size, path in sorted(artifacts):
+        if size <= ARTIFACTS_MAX_SIZE:
+            break
+        with file_lock(f"{path}.lock"):
+            if os.path.exists(path):
+                os.remove(path)
+        size -= artifact_size
@@ -0,0 +1,101 @@
+import time
+import random
+from datetime import datetime, timedelta
+from threading import Lock
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from sqlalchemy import func
+
+from app.database import db, Observation
+from app.services.get_real_time_obs import fetch, station_url, parse_metars, store_observations
+
+
+class RateLimiter:
+    '''At most `rate` request starts per second, shared by every fetch thread'''
+
+    def __init__(self, rate):
+        self.interval = 1 / rate
+        self.next = time.monotonic()
+        self.lock = Lock()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next - now
+            self.next = max(self.next, now) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+def pending_days(station, start, end, min_observations):
+    '''Days of [start, end] with fewer than min_observations stored, a day is
+    stored in a single commit so this is where an interrupted run resumes'''
+    counts = db.session.query(func.date(Observation.date), func.count(Observation.id)) \
+        .filter((Observation.station == station) & (Observation.date >= start) & (Observation.date < end + timedelta(days=1))) \
+        .group_by(func.date(Observation.date)).all()
+    counts = {str(day): count for day, count in counts}
+
+    days = []
+    day = start
+    while day <= end:
+        if counts.get(day.strftime('%Y-%m-%d'), 0) < min_observations:
+            days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+def fetch_day(station, day, limiter, retries):
+    '''METARs of one station and day, None when every attempt failed'''
+    for attempt in range(retries + 1):
+        limiter.wait()
+        # The rate limiter has to see every attempt, so retries stay here
+        metars = fetch(station_url(station, day, day + timedelta(hours=23)), retries=0)
+        if metars is not None:
+            return metars
+        if attempt == retries:
+            break
+        # Exponential backoff with jitter
+        time.sleep(2 ** attempt + random.random())
+    return None
+
+
+def backfill(stations, start, end, concurrency=4, rate=1.0, retries=3, min_observations=20):
+    '''Pull the METARs of [start, end] in day sized ogimet requests with
+    bounded concurrency, parse them in a process pool and write every day
+    into the observation store as soon as it is parsed'''
+    start = datetime(start.year, start.month, start.day)
+    end = datetime(end.year, end.month, end.day)
+
+    days = [(station, day) for station in stations for day in pending_days(station, start, end, min_observations)]
+    print('[backfill]: pending days', len(days))
+
+    limiter = RateLimiter(rate)
+    stored = 0
+    failed = []
+
+    with ThreadPoolExecutor(max_workers=concurrency) as fetchers, ProcessPoolExecutor() as parsers:
+        tasks = {fetchers.submit(fetch_day, station, day, limiter, retries): ('fetch', station, day) for station, day in days}
+        pending = set(tasks)
+
+        while len(pending) > 0:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, station, day = tasks.pop(future)
+
+                if stage == 'fetch':
+                    metars = future.result()
+                    if metars is None:
+                        failed.append((station, day))
+                        continue
+                    parse = parsers.submit(parse_metars, metars)
+                    tasks[parse] = ('parse', station, day)
+                    pending.add(parse)
+                else:
+                    day_stored = store_observations(future.result(), station)
+                    stored += day_stored
+                    print('[backfill]: stored', station, day.strftime('%Y-%m-%d'), day_stored)
+
+    if len(failed) > 0:
+        print('[backfill]: failed days', [f"{station} {day.strftime('%Y-%m-%d')}" for station, day in sorted(failed)])
+
+    return stored, failed
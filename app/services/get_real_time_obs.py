@@ -1,82 +1,197 @@
 import os
-import re
+import traceback
+from contextlib import contextmanager
 
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3' 
 
 from datetime import date, datetime, timedelta
 
-from urllib.request import urlopen
-from bs4 import BeautifulSoup
 import pandas as pd
 import numpy as np
 
-from threading import Thread 
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+
+from app.database import db, Report, ModelData, Observation, ForecastHistory, Counter
+from app.constants import TMP_DIR
+from app.services.archive import append_report
+from app.services.http import get, get_all, HTTP_RETRIES
+from app.services.artifacts import get_artifact, publish_artifact, file_lock
+from app.services.lstm import LSTMModel, Scaler, save_weights, load_weights, quantize
+from app.services.registry import MODEL_DTYPE, latest_version, get_entry, load_entry, register
+from app.services.training import ReplayBuffer, REPLAY_FILE, REPLAY_CAPACITY, TRAIN_MIN_NEW, MIN_VALIDATION, split, validation_error, fit_candidate
+from app.services.metar_parser import parse_batch
+from app.services.metar_stream import stream_metars
+from app.services.windows import stream_windows
+from app.services.metrics import span, JOB_FAILURES, FETCH_FAILURES, PARSE_FAILURES, GAPS_IMPUTED
 
-from metar import Metar
+model = None
+scaler = None
+# Registry version of model, None for the model built from the source files
+model_version = None
+keras_model = None
+replay = None
+replay_mtime = None
 
-import keras
-import joblib
-from sklearn.preprocessing import MinMaxScaler
-from keras.utils import data_utils
+MODEL_FILE = f"{TMP_DIR}/model.h5"
 
-from app.database import db, Report, ModelData
-from app.services.s3 import get_file, upload_file
+OGIMET_URL = os.getenv('OGIMET_URL', 'https://www.ogimet.com/display_metars2.php')
+FETCH_CHUNK_SIZE = 64 * 1024
 
-model = None
-scaler = None
+TIME_STEPS = 4
+OBSERVATIONS_WINDOW = 24
 
-TMP_DIR = f"{os.path.abspath(os.getcwd())}/tmp"
+# Hours forecast per report and the Kelvin offsets of the extra scenarios
+# rolled out with it, e.g. FORECAST_SCENARIOS=-1,1
+FORECAST_HORIZON = int(os.getenv('FORECAST_HORIZON', 24))
+REPLAY_SEED_DAYS = int(os.getenv('REPLAY_SEED_DAYS', 30))
+FORECAST_SCENARIOS = [float(offset) for offset in os.getenv('FORECAST_SCENARIOS', '').split(',') if offset != '']
 
 # Fetch Observations
 
-def fetch(url):
+def fetch(url, retries=HTTP_RETRIES):
+    '''METARs of an ogimet fmt=txt page, extracted chunk by chunk while the
+    response streams in. None when the request failed'''
     try:
-        html = urlopen(url).read()
-        soup = BeautifulSoup(html, features='html.parser')
-        for script in soup(["script", "style"]):
-            script.extract()
-        return soup
-    except Exception:
+        with span('ogimet_fetch'):
+            with get(url, retries, stream=True) as response:
+                return list(stream_metars(response.iter_content(FETCH_CHUNK_SIZE)))
+    except Exception as e:
+        FETCH_FAILURES.inc()
+        print('[fetch]:', e)
         return None
 
 
-def get_last_cortissoz_metars(date):
-    now = datetime.utcnow()
-    url = f"https://www.ogimet.com/display_metars2.php?lang=en&lugar=SKBQ&tipo=SA&ord=DIR&nil=NO&fmt=txt&ano={date.year}&mes={date.month}&day={date.day}&hora={date.hour-5}&min=00&anof={now.year}&mesf={now.month}&dayf={now.day}&horaf={now.hour}&minf=59"
-    soup = fetch(url)
-    if soup is None:
-        return []
-    text = soup.get_text()
-    if f"No hay METAR/SPECI de SKBQ en el periodo solicitado" in text:
-        return []
-    data = []
-    text = re.sub('\s\s+', ' ', text)
-    matches = re.findall(r"\s(\d+)[\s]METAR\s(.*)=", text)
-    for match in matches:
-        if ',' not in match:
-            data.append(match)
-    return data
+def station_url(station, start, end):
+    return f"{OGIMET_URL}?lang=en&lugar={station}&tipo=SA&ord=DIR&nil=NO&fmt=txt&ano={start.year}&mes={start.month}&day={start.day}&hora={start.hour}&min=00&anof={end.year}&mesf={end.month}&dayf={end.day}&horaf={end.hour}&minf=59"
+
+
+# Observation store
+def hour_floor(date):
+    return date.replace(minute=0, second=0, microsecond=0)
+
+
+def store_observations(df, station):
+    if df.shape[0] == 0:
+        return 0
+
+    dates = [date.to_pydatetime() for date in df['date']]
+    stored = db.session.query(Observation.date) \
+        .filter((Observation.station == station) & Observation.date.in_(dates)).all()
+    stored = set(date for date, in stored)
+
+    observations = []
+    for row in df.itertuples(index=False):
+        date = row.date.to_pydatetime()
+        if date not in stored:
+            observations.append(Observation(station=station, date=date, air=float(row.air), metar=row.metar))
+
+    try:
+        db.session.add_all(observations)
+        db.session.commit()
+    except IntegrityError:
+        # Another worker stored the same hours first
+        db.session.rollback()
+        return 0
+
+    return len(observations)
+
+
+def missing_ranges(station, start, end):
+    '''Hour ranges of [start, end] not covered by the store for a station'''
+    start = hour_floor(start)
+    end = hour_floor(end)
+
+    first, last = db.session.query(func.min(Observation.date), func.max(Observation.date)) \
+        .filter(Observation.station == station).one()
+
+    ranges = []
+    if first is None:
+        ranges.append((start, end))
+    else:
+        if start < first:
+            ranges.append((start, first - timedelta(hours=1)))
+        if last < end:
+            ranges.append((max(start, last + timedelta(hours=1)), end))
+
+    return [(range_start, range_end) for range_start, range_end in ranges if range_start <= range_end]
+
+
+def sync_observations(stations, start, end):
+    '''Fetch from ogimet only the hours of [start, end] not covered by the
+    store, the requests of every station are fanned out concurrently'''
+    requests = [(station, range_start, range_end)
+                for station in stations
+                for range_start, range_end in missing_ranges(station, start, end)]
+    if len(requests) == 0:
+        return 0
+
+    with span('ogimet_fanout'):
+        responses = get_all([station_url(*request) for request in requests], stream=True)
+
+    # Bodies are read one page at a time, chunk by chunk
+    stored = 0
+    try:
+        for (station, _, _), response in zip(requests, responses):
+            if isinstance(response, Exception):
+                FETCH_FAILURES.inc()
+                print('[fetch]:', response)
+                continue
+            metars = list(stream_metars(response.iter_content(FETCH_CHUNK_SIZE)))
+            response.close()
+            stored += store_observations(parse_metars(metars), station)
+    finally:
+        for response in responses:
+            if not isinstance(response, Exception):
+                response.close()
+    return stored
+
+
+def get_observations(station, start, end):
+    observations = db.session.query(Observation.date, Observation.air) \
+        .filter((Observation.station == station) & (Observation.date >= hour_floor(start)) & (Observation.date <= end)) \
+        .order_by(Observation.date).all()
+
+    df = pd.DataFrame(observations, columns=['date', 'air'])
+    df['date'] = pd.to_datetime(df['date'])
+    return df
 
-# Parse data from METAR
-def get_temperature(obs):
-    """ returns temp K """
-    return float(re.findall(r".*temperature:\s(.*)[\s]C\s*", obs)[0]) + 273.15
 
+def store_history(df, forecast, report_id, station):
+    '''Write the observed series and the forecast of a report keyed by hour,
+    so the dashboard can read the whole history with one range query'''
+    forecast_date = df['date'].iloc[-1].to_pydatetime() + timedelta(hours=1)
+    values = {date.to_pydatetime(): float(air) for date, air in zip(df['date'], df['air'])}
 
+    rows = db.session.query(ForecastHistory) \
+        .filter((ForecastHistory.station == station) & ForecastHistory.date.in_(list(values) + [forecast_date])).all()
+    rows = {row.date: row for row in rows}
+
+    for date, air in values.items():
+        row = rows.get(date) or ForecastHistory(station=station, date=date)
+        row.air = air
+        db.session.add(row)
+
+    row = rows.get(forecast_date) or ForecastHistory(station=station, date=forecast_date)
+    row.forecast = forecast
+    row.report_id = report_id
+    db.session.add(row)
+
+
+# Parse data from METAR
 def parse_metars(metars):
-    df = []
-    for metar in metars:
-        try:
-            temp = 0.0
-            obs = Metar.Metar(metar[1]).string()
-            temp = get_temperature(obs)
-            df.append([datetime.strptime(metar[0], '%Y%m%d%H%M'), temp])
-        except Exception as e:
-            error = e
-            # print('error:', e)
-
-    df = pd.DataFrame(df,columns=['date', 'air'])
-    df['date'] = df['date'].apply(lambda x: x.replace(minute=0, second=0))
+    columns, failures = parse_batch(metars)
+    if failures > 0:
+        PARSE_FAILURES.inc(failures)
+        print('[parse_metars]: failures', failures, len(metars))
+
+    df = pd.DataFrame({
+        # Floored to the hour
+        'date': columns['date'].astype('datetime64[h]').astype('datetime64[ns]'),
+        'air': columns['temperature'] + 273.15,
+        'metar': columns['metar'],
+    })
+    df = df.dropna(subset=['date', 'air'])
     df = df.drop_duplicates(subset='date')
     df = df.reset_index(drop=True)
     df = df.sort_values(by='date')
@@ -84,121 +199,348 @@ def parse_metars(metars):
 
 
 # Model helpers
-def create_dataset(dataset, time_steps):
-    '''Function to create a dataset to feed into an LSTM. Returns X, Y'''
-    X, Y = [], []
-    for i in range(dataset.shape[0] - time_steps):
-        X.append(dataset[i:(i + time_steps), 0])
-        Y.append(dataset[i + time_steps, 0])
-    return np.array(X), np.array(Y)
+def fix_gaps(df, time_steps):
+    '''Reindex df to a continuous hourly series and impute the missing hours.
+    Each wave predicts every gap whose previous time_steps hours are known in a
+    single batch, so the number of predict calls is the length of the longest
+    gap, not the number of gaps. Returns the fixed df and the imputed count'''
+    if df.shape[0] < time_steps:
+        raise ValueError(f"not enough observations to fix gaps: {df.shape[0]}")
+
+    series = df.set_index('date')['air']
+    index = pd.date_range(series.index[0], series.index[-1], freq=timedelta(hours=1))
+    values = series.reindex(index).values.astype(float)
+
+    known = ~np.isnan(values)
+    known_sums = np.concatenate([[0], np.cumsum(known)])
+    runs = known_sums[time_steps:] - known_sums[:-time_steps] == time_steps
+
+    if not runs.any():
+        raise ValueError(f"no {time_steps} consecutive observations to fix gaps")
+
+    # Drop the leading hours without a full window to impute from
+    first = np.argmax(runs)
+    index = index[first:]
+    values = values[first:]
+
+    offsets = np.arange(-time_steps, 0)
+    imputed = 0
+    while True:
+        missing = np.isnan(values)
+        if not missing.any():
+            break
+
+        known_sums = np.concatenate([[0], np.cumsum(~missing)])
+        positions = np.arange(time_steps, values.shape[0])
+        ready = missing[time_steps:] & (known_sums[time_steps:-1] - known_sums[:-time_steps - 1] == time_steps)
+        positions = positions[ready]
+
+        data = values[positions[:, None] + offsets].reshape(-1, 1)
+        data = scaler.transform(data)
+        y_score = model.predict(np.reshape(data, (positions.shape[0], time_steps, 1)))
+        y_score = scaler.inverse_transform(y_score)
 
+        values[positions] = y_score[:, 0]
+        imputed += positions.shape[0]
 
-def job():
-    try:
-        now = datetime.utcnow()
-        metars = get_last_cortissoz_metars(now)
-        last_data_df = parse_metars(metars)
-        print('[job]: last metars fetched', last_data_df.shape)
+    return pd.DataFrame({'date': index, 'air': values}), imputed
 
-        boundary = (datetime.today() - timedelta(hours=5))
 
-        # Fix unreported observations using the model
-        now = datetime.utcnow()
-        metars = get_last_cortissoz_metars(now)
-        last_data_df = parse_metars(metars)
-
-        boundary = (datetime.today() - timedelta(hours=4))
-
-        while True:
-            for idx, row in last_data_df.iterrows():
-                expected = boundary + timedelta(hours=idx)
-                if row.date.hour != expected.hour:
-                    if idx < 4:
-                        metars = get_last_cortissoz_metars(expected)
-                        last_data_df = parse_metars(metars)
-                        boundary -= timedelta(hours=5)
-                    else:
-                        data = last_data_df[idx-4:idx]['air'].values.reshape(-1,1)
-                        data = scaler.transform(data)
-                        y_score = model.predict(np.reshape(data, (1, 4, 1)))
-                        y_score = scaler.inverse_transform(y_score)
-                        last_data_df = last_data_df.append({'date': expected, 'air': y_score[0][0] }, ignore_index=True)
-                        last_data_df = last_data_df.sort_values(by='date')
-                        last_data_df = last_data_df.reset_index(drop=True)
-                    break
-
-            if idx == last_data_df.shape[0] - 1:
-                break
-
-        print('[job]: data fixed', last_data_df.shape)
-
-        last_data_df = last_data_df.tail(5)
-
-        # Normalization
-        test_data = last_data_df['air'].values.reshape(-1,1)
-        test_data = scaler.transform(test_data)
-
-        # Fit last observation
-        time_steps = 4
-        X_test, y_test = create_dataset(test_data, time_steps)
-
-        X_test = np.reshape(X_test, (X_test.shape[0], time_steps, 1))
-        model.fit(X_test, y_test, batch_size=4)
-
-        # Forecast
-        X_last_data = np.reshape(test_data[1:5], (1, time_steps, 1))
-        y_score = model.predict(X_last_data)
-        y_score = scaler.inverse_transform(y_score)
+def rollout(windows, horizon, offsets=()):
+    '''Forecast the next `horizon` hours of every window (n, time_steps) in
+    Kelvin, plus one scenario per offset added to the window, with a single
+    batched rollout. Returns (n, horizon) and (n, len(offsets), horizon)'''
+    offsets = np.concatenate([[0], offsets])
+    data = windows[:, None, :] + offsets[None, :, None]
+    data = scaler.transform(data.reshape(-1, 1))
 
-        report = db.session.query(Report).filter(Report.active == True)
-        last_reports = db.session.query(Report).filter(Report.active == False).count()
+    y_score = model.rollout(np.reshape(data, (-1, windows.shape[1], 1)), horizon)
+    y_score = scaler.inverse_transform(y_score).reshape(windows.shape[0], offsets.shape[0], horizon)
+    return y_score[:, 0], y_score[:, 1:]
 
-        filename = f"{datetime.utcnow().strftime('%Y%m%d%H')}.csv"
-        tmp_path = f"{TMP_DIR}/{filename}"
 
-        last_data_df.to_csv(tmp_path, index=False)
-        path = upload_file('reports', filename, tmp_path)
+def increment_counter(name):
+    '''In place UPDATE value = value + 1, concurrent workers never lose a
+    count. Returns the new value, visible to others on commit'''
+    updated = db.session.query(Counter).filter(Counter.name == name) \
+        .update({Counter.value: Counter.value + 1}, synchronize_session=False)
+    if updated == 0:
+        db.session.add(Counter(name=name, value=1))
+        db.session.flush()
+    return db.session.query(Counter.value).filter(Counter.name == name).scalar()
 
-        if last_reports > 0 and last_reports % 5 == 0:
-            filename = 'model.h5'
-            tmp_path = f"{TMP_DIR}/{filename}"
 
-            model.save(path)
-            upload_file('data', filename, tmp_path)
+def finish_failed(report_ids):
+    '''Finish reports without a path so they are not retried forever'''
+    db.session.rollback()
+    db.session.query(Report).filter(Report.id.in_(report_ids)).update({"active": False}, synchronize_session=False)
+    db.session.commit()
 
-        forecast = float(y_score[0][0])
 
-        report.update({"active": False, "forecast": forecast, "path": path})
-        db.session.commit()
+def job(report_ids):
+    '''Forecast the next FORECAST_HORIZON hours of every station of
+    report_ids (one report per station) with a single batched rollout. The
+    job only predicts, training runs in retrain()'''
+    try:
+        refresh_model()
 
-        print('[job]: data saved', forecast, path)
-    except Exception as e:
-        print(e)
+        reports = db.session.query(Report).filter(Report.id.in_(report_ids)).order_by(Report.id).all()
+
+        now = datetime.utcnow()
+        start = now - timedelta(hours=OBSERVATIONS_WINDOW)
+
+        with span('sync_observations'):
+            stored = sync_observations([report.station for report in reports], start, now)
+        print('[job]: last metars fetched', stored)
+
+        windows = []
+        for report in reports:
+            try:
+                with span('get_observations'):
+                    last_data_df = get_observations(report.station, start, now)
+                observed = set(last_data_df['date'])
+
+                # Fix unreported observations using the model
+                with span('fix_gaps'):
+                    last_data_df, imputed = fix_gaps(last_data_df, TIME_STEPS)
+                GAPS_IMPUTED.inc(imputed)
+                print('[job]: data fixed', report.station, imputed, last_data_df.shape)
+
+                # The batched rollout needs TIME_STEPS + 1 hours from every station
+                if last_data_df.shape[0] < TIME_STEPS + 1:
+                    raise ValueError(f"not enough hours for a window: {last_data_df.shape[0]}")
+
+                window = last_data_df.tail(TIME_STEPS + 1)
+                windows.append((report, window, window['date'].isin(observed).all()))
+            except ValueError as e:
+                print('[job]:', report.station, e)
+                finish_failed([report.id])
+
+        if len(windows) == 0:
+            return
+
+        # Normalization, one row per station
+        air = np.stack([df['air'].values for _, df, _ in windows])
+        test_data = scaler.transform(air.reshape(-1, 1)).reshape(air.shape)
+
+        # Windows without imputed hours are kept for the background training
+        known = np.array([known for _, _, known in windows])
+        if known.any():
+            with span('replay'), locked_replay() as buffer:
+                buffer.add(test_data[known, :TIME_STEPS], test_data[known, TIME_STEPS])
+
+        # Forecast every station and scenario with a single batched rollout
+        with span('rollout'):
+            horizons, scenarios = rollout(air[:, 1:], FORECAST_HORIZON, FORECAST_SCENARIOS)
+
+        for (report, last_data_df, _), horizon, report_scenarios in zip(windows, horizons, scenarios):
+            forecast = float(horizon[0])
+            try:
+                with span('archive_write'):
+                    path = append_report(last_data_df, forecast, report.id, report.station)
+            except Exception:
+                # The forecast is kept, only the archive rows of the report are missing
+                traceback.print_exc()
+                path = None
+            with span('store_history'):
+                store_history(last_data_df, forecast, report.id, report.station)
+
+            report.active = False
+            report.forecast = forecast
+            report.horizon_start = last_data_df['date'].iloc[-1].to_pydatetime() + timedelta(hours=1)
+            report.horizon = [float(value) for value in horizon]
+            report.scenarios = {str(offset): [float(value) for value in values] for offset, values in zip(FORECAST_SCENARIOS, report_scenarios)}
+            report.path = path
+
+            print('[job]: data saved', report.station, forecast, path)
+
+        with span('commit'):
+            db.session.commit()
+    except Exception:
+        JOB_FAILURES.inc()
+        traceback.print_exc()
+        finish_failed(report_ids)
+
+
+def get_replay():
+    '''The replay buffer, reloaded when another process (manager.py replay)
+    saved the file since this one last read or wrote it'''
+    global replay
+    global replay_mtime
+
+    mtime = os.stat(REPLAY_FILE).st_mtime_ns if os.path.exists(REPLAY_FILE) else None
+    if replay is None or mtime != replay_mtime:
+        replay = ReplayBuffer.load(REPLAY_FILE, REPLAY_CAPACITY, TIME_STEPS)
+        replay_mtime = mtime
+    return replay
+
+
+@contextmanager
+def locked_replay():
+    '''The replay buffer under the file lock, saved on exit, so windows saved
+    by another process are never overwritten'''
+    global replay_mtime
+
+    os.makedirs(os.path.dirname(REPLAY_FILE), exist_ok=True)
+    with file_lock(f"{REPLAY_FILE}.lock"):
+        buffer = get_replay()
+        yield buffer
+        buffer.save(REPLAY_FILE)
+        replay_mtime = os.stat(REPLAY_FILE).st_mtime_ns
+
+
+def retrain():
+    '''Fine-tune a copy of the model on the replay buffer in mini-batches and
+    promote it, as a new model version, only when it beats the serving model
+    on the newest windows. Returns whether a version was promoted, None when
+    the round was skipped'''
+    global model
+    global scaler
+    global model_version
+    global keras_model
+
+    try:
+        refresh_model()
+
+        buffer = get_replay()
+        X, y = buffer.arrays()
+        trained = buffer.new
+        if buffer.new < TRAIN_MIN_NEW or y.shape[0] < 2 * MIN_VALIDATION:
+            print('[retrain]: skipped, windows', buffer.new, y.shape[0])
+            return None
+
+        (X_train, y_train), (X_val, y_val) = split(X, y)
+        with span('fit'):
+            candidate = fit_candidate(load_keras_model(), X_train, y_train)
+        # Judged with the weights it would be served with
+        candidate_model = quantize(LSTMModel.from_keras(candidate), MODEL_DTYPE)
+
+        current_error = validation_error(model, X_val, y_val)
+        candidate_error = validation_error(candidate_model, X_val, y_val)
+        print('[retrain]: validation mse', current_error, candidate_error)
+
+        # Windows added while fitting stay new for the next round
+        with locked_replay() as buffer:
+            buffer.new = max(buffer.new - trained, 0)
+
+        if candidate_error >= current_error:
+            return False
+
+        version = increment_counter('model_version')
+        if register(version, candidate_model, scaler, candidate_error) is None:
+            db.session.rollback()
+            return False
+
+        # The keras model is where the next rounds start from
+        candidate.save(MODEL_FILE)
+        model_data = get_model_data('data/model.h5')
+        model_data.version = version
+        model_data.score = candidate_error
+        if publish_artifact(model_data, MODEL_FILE) is None:
+            print('[retrain]: keras model not published, version', version)
+            db.session.rollback()
+
+        keras_model = candidate
+        model, scaler, model_version = candidate_model, scaler, version
+        print('[retrain]: promoted version', version)
+        return True
+    except Exception:
+        traceback.print_exc()
+        db.session.rollback()
+        return None
 
 
-def run():
+def observation_chunks(station, start, end, days=REPLAY_SEED_DAYS):
+    '''Hourly air series of a station from start to end as consecutive arrays
+    of at most `days` days, one query each. Hours without an observation are
+    NaN'''
+    chunk_start = hour_floor(start)
+    end = hour_floor(end) + timedelta(hours=1)
+    while chunk_start < end:
+        chunk_end = min(chunk_start + timedelta(days=days), end)
+        df = get_observations(station, chunk_start, chunk_end - timedelta(microseconds=1))
+
+        values = np.full((chunk_end - chunk_start) // timedelta(hours=1), np.nan)
+        positions = (df['date'].values.astype('datetime64[h]') - np.datetime64(chunk_start, 'h')).astype(int)
+        values[positions] = df['air'].values
+        yield values
+        chunk_start = chunk_end
+
+
+def seed_replay(stations, start, end):
+    '''Add the fully observed windows of the days [start, end] of the
+    observation store, e.g. after a backfill, to the replay buffer. Returns
+    the number of windows added'''
+    refresh_model()
+    start = datetime(start.year, start.month, start.day)
+    end = datetime(end.year, end.month, end.day) + timedelta(hours=23)
+
+    added = 0
+    for station in stations:
+        station_windows = []
+        for X, Y in stream_windows(observation_chunks(station, start, end), TIME_STEPS):
+            known = ~np.isnan(X).any(axis=(1, 2)) & ~np.isnan(Y).any(axis=1)
+            if known.any():
+                station_windows.append(np.concatenate([X[known, :, 0], Y[known]], axis=1))
+        if len(station_windows) == 0:
+            continue
+
+        windows = np.concatenate(station_windows)
+        windows = scaler.transform(windows.reshape(-1, 1)).reshape(windows.shape)
+        # One locked write per station, the worker saves the same file
+        with locked_replay() as buffer:
+            buffer.add(windows[:, :TIME_STEPS], windows[:, TIME_STEPS])
+        added += windows.shape[0]
+        print('[replay]: seeded', station, windows.shape[0])
+
+    return added
+
+
+def get_model_data(path):
+    return db.session.query(ModelData).filter(ModelData.path == path).first()
+
+
+def refresh_model():
+    '''Load the serving model on first use and hot-swap it when the registry
+    has a newer version, e.g. promoted by another worker. Jobs run one at a
+    time per worker, so a swap never lands in the middle of a rollout'''
     global model
     global scaler
+    global model_version
+    global keras_model
 
-    if model is None or scaler is None:
-        keras_model_db = db.session.query(ModelData).filter(ModelData.path == 'data/model.h5').first()
-        model_file = data_utils.get_file('model.h5', get_file(keras_model_db))
-        model = keras.models.load_model(model_file)
+    version = latest_version()
+    if model is not None and version == model_version:
+        return
 
-        scaler__db = db.session.query(ModelData).filter(ModelData.path == 'data/scaler.save').first()
-        scaler_file = data_utils.get_file('scaler.save', get_file(scaler__db))
-        scaler = joblib.load(scaler_file)
+    with span('load_model'):
+        loaded = load_model() if version is None else load_entry(get_entry(version))
+    model, scaler, model_version = loaded + (version,)
+    # The keras copy fine-tuned by retrain() belongs to the previous version
+    keras_model = None
+    print('[model]: serving version', version)
 
-    delay = datetime.now() - timedelta(minutes=55)
-    active_report = db.session.query(Report).filter((Report.active == True) | (Report.created > delay)).first()
-    if active_report is not None:
-        return 'skipped', active_report
 
-    report = Report()
-    db.session.add(report)
-    db.session.commit()
+def load_model():
+    '''Export the keras model and the scaler to NumPy weights once per model
+    version, so forecasting never imports TensorFlow or sklearn'''
+    model_file = get_artifact(get_model_data('data/model.h5'))
+    scaler_file = get_artifact(get_model_data('data/scaler.save'))
+
+    weights_file = f"{model_file}.{os.path.basename(scaler_file)}.npz"
+    if not os.path.exists(weights_file):
+        import joblib
+        save_weights(weights_file, LSTMModel.from_h5(model_file), Scaler.from_sklearn(joblib.load(scaler_file)))
+
+    return load_weights(weights_file)
+
+
+def load_keras_model():
+    '''TensorFlow is only loaded here, when the model is retrained'''
+    global keras_model
 
-    Thread(target=job, daemon=True).start()
+    if keras_model is None:
+        import keras
+        keras_model = keras.models.load_model(get_artifact(get_model_data('data/model.h5')))
 
-    return 'sent', report
-    
\ No newline at end of file
+    return keras_model
@@ -0,0 +1,114 @@
+import os
+import time
+import random
+import asyncio
+import threading
+from functools import partial
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 5))
+HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', 30))
+HTTP_RETRIES = int(os.getenv('HTTP_RETRIES', 3))
+# Requests in flight to the same host, shared by every thread of the process
+HTTP_HOST_CONCURRENCY = int(os.getenv('HTTP_HOST_CONCURRENCY', 4))
+HTTP_POOL_SIZE = 16
+
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 30
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+lock = threading.Lock()
+session = None
+executor = None
+host_limits = {}
+
+
+def get_session():
+    '''requests is imported and the pooled session created on first use'''
+    global session
+
+    with lock:
+        if session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=0)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+    return session
+
+
+def host_limit(url):
+    host = urlparse(url).netloc
+    with lock:
+        if host not in host_limits:
+            host_limits[host] = threading.BoundedSemaphore(HTTP_HOST_CONCURRENCY)
+        return host_limits[host]
+
+
+def get(url, retries=HTTP_RETRIES, stream=False):
+    '''GET through the shared connection pool with connect and read timeouts.
+    Connection errors, timeouts, 429 and 5xx are retried with full jitter
+    exponential backoff, the last error is raised'''
+    import requests
+
+    error = None
+    for attempt in range(retries + 1):
+        if attempt > 0:
+            time.sleep(random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt)))
+
+        try:
+            with host_limit(url):
+                response = get_session().get(url, timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT), stream=stream)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            error = e
+            continue
+
+        if response.status_code in RETRY_STATUS:
+            error = requests.HTTPError(f"{response.status_code} for {url}", response=response)
+            response.close()
+            continue
+
+        response.raise_for_status()
+        return response
+
+    raise error
+
+
+def download(url, path, retries=HTTP_RETRIES, chunk_size=1024 * 1024):
+    '''Stream a URL to a file, returns the number of bytes written'''
+    size = 0
+    with get(url, retries, stream=True) as response, open(path, 'wb') as f:
+        for chunk in response.iter_content(chunk_size):
+            f.write(chunk)
+            size += len(chunk)
+    return size
+
+
+def get_executor():
+    global executor
+
+    with lock:
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=HTTP_POOL_SIZE, thread_name_prefix='http')
+    return executor
+
+
+async def get_async(url, retries=HTTP_RETRIES, stream=False):
+    '''Awaitable get(), runs on the HTTP thread pool so the pool, the
+    timeouts and the per-host limit are the same as the blocking calls'''
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(get_executor(), partial(get, url, retries, stream))
+
+
+async def gather_get(urls, retries=HTTP_RETRIES, stream=False):
+    return await asyncio.gather(*[get_async(url, retries, stream) for url in urls], return_exceptions=True)
+
+
+def get_all(urls, retries=HTTP_RETRIES, stream=False):
+    '''Fan out GETs of many URLs (stations, windows), returns a response or
+    the raised exception per URL, in order. With stream=True only the
+    headers are read and the caller closes the responses'''
+    return asyncio.run(gather_get(urls, retries, stream))
@@ -0,0 +1,235 @@
+import os
+import json
+
+import numpy as np
+
+ACTIVATIONS = {
+    'linear': lambda x: x,
+    'tanh': np.tanh,
+    'sigmoid': lambda x: 1 / (1 + np.exp(-x)),
+    'hard_sigmoid': lambda x: np.clip(0.2 * x + 0.5, 0, 1),
+    'relu': lambda x: np.maximum(x, 0),
+}
+
+
+class Scaler:
+    '''MinMaxScaler transform/inverse_transform with plain array math'''
+
+    def __init__(self, scale, min):
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.min = np.asarray(min, dtype=np.float64)
+
+    @classmethod
+    def from_sklearn(cls, scaler):
+        return cls(scaler.scale_, scaler.min_)
+
+    def transform(self, X):
+        return X * self.scale + self.min
+
+    def inverse_transform(self, X):
+        return (X - self.min) / self.scale
+
+
+class LSTMModel:
+    '''Forward pass of the stacked LSTM + Dense forecast model in NumPy.
+    Layers are described by a spec list ({'type': 'lstm' | 'dense', ...})
+    with their keras weights in the same order as model.get_weights()'''
+
+    def __init__(self, spec, weights):
+        self.spec = spec
+        self.weights = [[np.asarray(w, dtype=np.float32) for w in layer] for layer in weights]
+        for layer, layer_weights in zip(self.spec, self.weights):
+            layer['n_weights'] = len(layer_weights)
+
+    @classmethod
+    def from_keras(cls, model):
+        spec, weights = [], []
+        for layer in model.layers:
+            layer_weights = layer.get_weights()
+            if len(layer_weights) == 0:
+                continue
+            spec.append(layer_spec(layer.__class__.__name__, layer.get_config()))
+            weights.append(layer_weights)
+        return cls(spec, weights)
+
+    @classmethod
+    def from_h5(cls, model_file):
+        '''Read the weights straight from a keras h5 file, without TensorFlow'''
+        import h5py
+
+        with h5py.File(model_file, 'r') as f:
+            config = json.loads(decode(f.attrs['model_config']))['config']
+            layers = config['layers'] if isinstance(config, dict) else config
+            configs = {layer['config']['name']: layer for layer in layers}
+
+            model_weights = f['model_weights']
+            spec, weights = [], []
+            for name in model_weights.attrs['layer_names']:
+                name = decode(name)
+                group = model_weights[name]
+                weight_names = [decode(weight) for weight in group.attrs['weight_names']]
+                if len(weight_names) == 0:
+                    continue
+                spec.append(layer_spec(configs[name]['class_name'], configs[name]['config']))
+                weights.append([np.asarray(group[weight]) for weight in weight_names])
+        return cls(spec, weights)
+
+    def predict(self, X):
+        '''X: (n, time_steps, features) -> (n, units of the last layer)'''
+        outputs, _ = self.forward(X)
+        return outputs
+
+    def forward(self, X, states=None):
+        '''predict that also takes and returns the (h, c) state of every LSTM
+        layer, so a sequence can be continued one step at a time'''
+        outputs = np.asarray(X, dtype=np.float32)
+        if states is None:
+            states = [None] * len(self.spec)
+
+        new_states = []
+        for layer, weights, state in zip(self.spec, self.weights, states):
+            if layer['type'] == 'lstm':
+                outputs, state = lstm_forward(layer, weights, outputs, state)
+            else:
+                kernel, bias = weights
+                outputs = ACTIVATIONS[layer['activation']](outputs @ kernel + bias)
+            new_states.append(state)
+        return outputs, new_states
+
+    def rollout(self, X, horizon):
+        '''Recursive forecast of the next `horizon` steps of every window of X
+        (n, time_steps, 1) -> (n, horizon). The window is read once, then each
+        prediction is fed back as a single step of the stateful LSTMs instead of
+        re-running a shifted window'''
+        outputs, states = self.forward(X)
+        steps = [outputs]
+        for _ in range(horizon - 1):
+            outputs, states = self.forward(outputs[:, None, :], states)
+            steps.append(outputs)
+        return np.concatenate(steps, axis=1)
+
+
+def save_weights(weights_file, model, scaler):
+    arrays = {'scale': scaler.scale, 'min': scaler.min}
+    for i, layer_weights in enumerate(model.weights):
+        for j, w in enumerate(layer_weights):
+            arrays[f"w_{i}_{j}"] = w
+    np.savez(weights_file, spec=json.dumps(model.spec), **arrays)
+
+
+def load_weights(weights_file):
+    with np.load(weights_file) as data:
+        spec = json.loads(str(data['spec']))
+        weights = [[data[f"w_{i}_{j}"] for j in range(layer['n_weights'])] for i, layer in enumerate(spec)]
+        scaler = Scaler(data['scale'], data['min'])
+    return LSTMModel(spec, weights), scaler
+
+
+PACKED_MAGIC = b'LSTMPACK'
+PACKED_ALIGN = 64
+
+
+def quantize(model, dtype):
+    '''The model with its weights rounded to `dtype`, as pack_weights stores them'''
+    return LSTMModel(model.spec, [[w.astype(dtype) for w in layer] for layer in model.weights])
+
+
+def pack_weights(path, model, scaler, dtype='float16'):
+    '''Single file inference artifact: a JSON header with the layer spec, the
+    weight shapes and the scaler, then every weight in one contiguous `dtype`
+    block, so loading is one read and one frombuffer'''
+    weights = [w for layer in model.weights for w in layer]
+    header = json.dumps({
+        'spec': model.spec,
+        'shapes': [list(w.shape) for w in weights],
+        'dtype': np.dtype(dtype).str,
+        'scale': scaler.scale.tolist(),
+        'min': scaler.min.tolist(),
+    }).encode('utf8')
+    # Pad the header so the block starts aligned
+    header += b' ' * (-(len(PACKED_MAGIC) + 4 + len(header)) % PACKED_ALIGN)
+    block = np.concatenate([w.ravel() for w in weights]).astype(dtype)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(PACKED_MAGIC)
+        f.write(len(header).to_bytes(4, 'little'))
+        f.write(header)
+        f.write(block.tobytes())
+    os.replace(tmp_path, path)
+
+
+def unpack_weights(path):
+    '''(LSTMModel, Scaler) of a pack_weights file, the weights are float32
+    views of a single upcast block'''
+    with open(path, 'rb') as f:
+        data = f.read()
+    if not data.startswith(PACKED_MAGIC):
+        raise ValueError(f"not a packed model: {path}")
+
+    offset = len(PACKED_MAGIC) + 4
+    size = int.from_bytes(data[len(PACKED_MAGIC):offset], 'little')
+    header = json.loads(data[offset:offset + size])
+    block = np.frombuffer(data, dtype=header['dtype'], offset=offset + size).astype(np.float32)
+
+    weights, position = [], 0
+    for shape in header['shapes']:
+        count = int(np.prod(shape))
+        weights.append(block[position:position + count].reshape(shape))
+        position += count
+
+    layers, position = [], 0
+    for layer in header['spec']:
+        layers.append(weights[position:position + layer['n_weights']])
+        position += layer['n_weights']
+    return LSTMModel(header['spec'], layers), Scaler(header['scale'], header['min'])
+
+
+def decode(value):
+    return value.decode('utf8') if isinstance(value, bytes) else value
+
+
+def layer_spec(class_name, config):
+    if class_name == 'LSTM':
+        return {
+            'type': 'lstm',
+            'units': config['units'],
+            'activation': config['activation'],
+            'recurrent_activation': config['recurrent_activation'],
+            'return_sequences': config['return_sequences'],
+        }
+    if class_name == 'Dense':
+        return {'type': 'dense', 'activation': config['activation']}
+    raise ValueError(f"unsupported layer: {class_name}")
+
+
+def lstm_forward(layer, weights, X, state=None):
+    kernel, recurrent_kernel, bias = weights
+    units = layer['units']
+    activation = ACTIVATIONS[layer['activation']]
+    recurrent_activation = ACTIVATIONS[layer['recurrent_activation']]
+
+    # Input projections for every time step in one matmul
+    projections = X @ kernel + bias
+
+    if state is None:
+        h = np.zeros((X.shape[0], units), dtype=np.float32)
+        c = np.zeros((X.shape[0], units), dtype=np.float32)
+    else:
+        h, c = state
+
+    sequence = []
+    for step in range(X.shape[1]):
+        z = projections[:, step] + h @ recurrent_kernel
+        # keras gate order: input, forget, cell, output
+        i = recurrent_activation(z[:, :units])
+        f = recurrent_activation(z[:, units:2 * units])
+        g = activation(z[:, 2 * units:3 * units])
+        o = recurrent_activation(z[:, 3 * units:])
+        c = f * c + i * g
+        h = o * activation(c)
+        sequence.append(h)
+
+    if layer['return_sequences']:
+        return np.stack(sequence, axis=1), (h, c)
+    return h, (h, c)
@@ -0,0 +1,91 @@
+import re
+
+import numpy as np
+
+TIME = re.compile(r'^(\d{2})(\d{2})(\d{2})Z$')
+WIND = re.compile(r'^(\d{3}|VRB)(\d{2,3})(?:G(\d{2,3}))?(KT|MPS|KMH)$')
+TEMPERATURE = re.compile(r'^(M?\d{2})/(M?\d{2})?$')
+PRESSURE = re.compile(r'^([AQ])(\d{4})$')
+
+# Groups after these tokens are remarks or trend forecasts, not observations
+END_TOKENS = {'RMK', 'NOSIG', 'BECMG', 'TEMPO'}
+
+WIND_TO_KT = {'KT': 1.0, 'MPS': 1.943844, 'KMH': 0.539957}
+INHG_TO_HPA = 33.8639
+
+COLUMNS = ['temperature', 'dewpoint', 'wind_dir', 'wind_speed', 'wind_gust', 'pressure']
+
+
+def parse_degrees(group):
+    '''"M05" -> -5.0'''
+    if group.startswith('M'):
+        return -float(group[1:])
+    return float(group)
+
+
+def parse_metar(metar):
+    '''Temperature/dewpoint (C), wind (degrees, kt), pressure (hPa) and the
+    observation time (day, hour, minute) straight from the raw tokens.
+    Missing groups are NaN'''
+    values = dict.fromkeys(COLUMNS, np.nan)
+    time = None
+
+    for token in metar.split():
+        if token in END_TOKENS:
+            break
+
+        match = TIME.match(token)
+        if match is not None and time is None:
+            time = tuple(int(group) for group in match.groups())
+            continue
+
+        match = WIND.match(token)
+        if match is not None:
+            direction, speed, gust, unit = match.groups()
+            values['wind_dir'] = np.nan if direction == 'VRB' else float(direction)
+            values['wind_speed'] = float(speed) * WIND_TO_KT[unit]
+            if gust is not None:
+                values['wind_gust'] = float(gust) * WIND_TO_KT[unit]
+            continue
+
+        match = TEMPERATURE.match(token)
+        if match is not None:
+            temperature, dewpoint = match.groups()
+            values['temperature'] = parse_degrees(temperature)
+            if dewpoint is not None:
+                values['dewpoint'] = parse_degrees(dewpoint)
+            continue
+
+        match = PRESSURE.match(token)
+        if match is not None:
+            unit, pressure = match.groups()
+            values['pressure'] = float(pressure) if unit == 'Q' else float(pressure) / 100 * INHG_TO_HPA
+
+    return values, time
+
+
+def parse_batch(metars):
+    '''Parse (timestamp 'YYYYmmddHHMM', metar) tuples into columns of NumPy
+    arrays. Reports without a timestamp or a temperature group are counted in
+    failures and kept as NaN/NaT rows so the columns stay aligned'''
+    size = len(metars)
+    columns = {column: np.full(size, np.nan) for column in COLUMNS}
+    dates = np.full(size, np.datetime64('NaT'), dtype='datetime64[m]')
+
+    failures = 0
+    for i, (timestamp, metar) in enumerate(metars):
+        try:
+            dates[i] = np.datetime64(f"{timestamp[:4]}-{timestamp[4:6]}-{timestamp[6:8]}T{timestamp[8:10]}:{timestamp[10:12]}")
+        except ValueError:
+            failures += 1
+            continue
+
+        values, _ = parse_metar(metar)
+        for column in COLUMNS:
+            columns[column][i] = values[column]
+        if np.isnan(values['temperature']):
+            failures += 1
+
+    columns['date'] = dates
+    columns['metar'] = np.array([metar for _, metar in metars], dtype=object)
+    return columns, failures
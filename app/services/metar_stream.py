@@ -0,0 +1,59 @@
+import re
+import codecs
+from html import unescape
+
+# "201901010000 METAR SKBQ 010000Z ...=", ogimet wraps long reports on
+# indented continuation lines
+RECORD = re.compile(r'^[ \t]*(\d{12})[ \t]+METAR[ \t]+([^=\n]*(?:\n[ \t]+[^=\n]*)*)=', re.MULTILINE)
+RECORD_START = re.compile(r'^[ \t]*\d{12}[ \t]+METAR[ \t]', re.MULTILINE)
+TAG = re.compile(r'<[^>]*>')
+NO_DATA = 'No hay METAR/SPECI'
+
+
+def scan(text):
+    '''Markup free text, its complete reports and the offset after the last one'''
+    if '<' in text:
+        text = TAG.sub('', text)
+    if '\r' in text:
+        text = text.replace('\r', '')
+
+    metars = []
+    end = 0
+    for match in RECORD.finditer(text):
+        metar = ' '.join(match.group(2).split())
+        metars.append((match.group(1), unescape(metar) if '&' in metar else metar))
+        end = match.end()
+    return text, metars, end
+
+
+def stream_metars(chunks):
+    '''Yield (timestamp 'YYYYmmddHHMM', metar) tuples from an ogimet fmt=txt
+    page as its chunks arrive (bytes or str, split anywhere). Only complete
+    lines are scanned, so a chunk and one unfinished report are all that is
+    held in memory. Reading stops at the "No hay METAR/SPECI" sentinel'''
+    decoder = codecs.getincrementaldecoder('utf8')(errors='replace')
+    carry = ''
+    found = False
+
+    for chunk in chunks:
+        if isinstance(chunk, bytes):
+            chunk = decoder.decode(chunk)
+        buffer = carry + chunk
+        lines_end = buffer.rfind('\n') + 1
+        carry = buffer[lines_end:]
+
+        text, metars, end = scan(buffer[:lines_end])
+        yield from metars
+        found = found or len(metars) > 0
+        if not found and NO_DATA in text:
+            return
+
+        # A report whose continuation lines are still to come
+        unfinished = None
+        for unfinished in RECORD_START.finditer(text, end):
+            pass
+        if unfinished is not None:
+            carry = text[unfinished.start():] + carry
+
+    _, metars, _ = scan(carry + decoder.decode(b'', final=True) + '\n')
+    yield from metars
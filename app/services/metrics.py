@@ -0,0 +1,51 @@
+import os
+import time
+from contextlib import contextmanager
+
+from app.constants import TMP_DIR
+
+# Every process of the host (gunicorn workers, forecast worker) writes its
+# samples to this directory and /metrics sums them. It has to be emptied
+# before the processes start, see the Dockerfile
+METRICS_DIR = os.getenv('METRICS_DIR', f"{TMP_DIR}/metrics")
+os.makedirs(METRICS_DIR, exist_ok=True)
+os.environ.setdefault('prometheus_multiproc_dir', METRICS_DIR)
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', METRICS_DIR)
+
+from prometheus_client import Counter, Histogram
+
+STAGE_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+STAGE_SECONDS = Histogram('forecast_stage_seconds', 'Duration of a pipeline stage', ['stage'], buckets=STAGE_BUCKETS)
+STAGE_ERRORS = Counter('forecast_stage_errors_total', 'Stages that raised', ['stage'])
+
+JOB_FAILURES = Counter('forecast_job_failures_total', 'Jobs whose reports finished without a forecast')
+FETCH_FAILURES = Counter('ogimet_fetch_failures_total', 'ogimet requests that failed')
+PARSE_FAILURES = Counter('metar_parse_failures_total', 'METARs without a time or a temperature group')
+GAPS_IMPUTED = Counter('gaps_imputed_total', 'Unreported hours imputed by the model')
+S3_BYTES = Counter('s3_bytes_total', 'Bytes moved to and from S3', ['direction'])
+DASHBOARD_CACHE = Counter('dashboard_cache_total', 'Dashboard page requests by render cache result', ['result'])
+
+
+@contextmanager
+def span(stage):
+    '''Time a stage into forecast_stage_seconds, a raised exception is
+    counted in forecast_stage_errors_total and propagated'''
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.labels(stage).inc()
+        raise
+    finally:
+        STAGE_SECONDS.labels(stage).observe(time.perf_counter() - start)
+
+
+def render():
+    '''(body, content type) of the samples of every process, Prometheus
+    text format'''
+    from prometheus_client import CollectorRegistry, CONTENT_TYPE_LATEST, generate_latest, multiprocess
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
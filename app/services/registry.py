@@ -0,0 +1,43 @@
+import os
+
+from sqlalchemy import func
+
+from app.constants import TMP_DIR
+from app.database import db, ModelData
+from app.services.artifacts import get_artifact, publish_artifact
+from app.services.lstm import pack_weights, unpack_weights
+
+MODEL_NAME = 'forecast'
+# Weights of the registry artifacts, float32 keeps them exact
+MODEL_DTYPE = os.getenv('MODEL_DTYPE', 'float16')
+
+
+def latest_version(name=MODEL_NAME):
+    '''Newest registered version, None before the first one. One lookup on
+    the (name, version) index, cheap enough to run before every job'''
+    return db.session.query(func.max(ModelData.version)).filter(ModelData.name == name).scalar()
+
+
+def get_entry(version, name=MODEL_NAME):
+    return db.session.query(ModelData).filter((ModelData.name == name) & (ModelData.version == version)).first()
+
+
+def load_entry(entry):
+    '''(LSTMModel, Scaler) of a registry entry, its artifact is downloaded
+    once per host'''
+    return unpack_weights(get_artifact(entry))
+
+
+def register(version, model, scaler, score=None, name=MODEL_NAME):
+    '''Pack the weights in MODEL_DTYPE and publish them as a new entry,
+    committed together with the caller's pending changes. Returns the entry,
+    None when the upload failed'''
+    os.makedirs(TMP_DIR, exist_ok=True)
+    path = f"{TMP_DIR}/{name}-v{version}.bin"
+    pack_weights(path, model, scaler, MODEL_DTYPE)
+
+    entry = ModelData(path=f"models/{name}/v{version}.bin", name=name, version=version, score=score)
+    db.session.add(entry)
+    etag = publish_artifact(entry, path)
+    os.remove(path)
+    return None if etag is None else entry
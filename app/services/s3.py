@@ -1,50 +1,94 @@
 import os
-import boto3
-from  urllib.request import urlopen
-from botocore.client import Config
+from datetime import datetime, timedelta
 from app.database import db
+from app.services.metrics import span, S3_BYTES
+from app.services.http import HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, HTTP_RETRIES, HTTP_POOL_SIZE
 
 AWS_ACCESS_KEY = os.getenv('AWS_ACCESS_KEY')
 AWS_SECRET_KEY = os.getenv('AWS_SECRET_KEY')
 AWS_BUCKET_NAME = os.getenv('AWS_BUCKET_NAME')
+# Region of the bucket, boto3's default chain when unset
+AWS_REGION = os.getenv('AWS_REGION') or None
 
-s3 = boto3.client(
-    's3',
-    aws_access_key_id=AWS_ACCESS_KEY,
-    aws_secret_access_key=AWS_SECRET_KEY,
-)
+URL_EXPIRES_IN = 604800
+URL_RENEW_MARGIN = timedelta(days=1)
+
+s3 = None
+
+
+def get_client():
+    '''boto3 is imported and the client created on first use, with the
+    timeouts, retry budget and pool size of the shared HTTP layer'''
+    global s3
+
+    if s3 is None:
+        import boto3
+        from botocore.config import Config
+        s3 = boto3.client(
+            's3',
+            aws_access_key_id=AWS_ACCESS_KEY,
+            aws_secret_access_key=AWS_SECRET_KEY,
+            region_name=AWS_REGION,
+            config=Config(
+                connect_timeout=HTTP_CONNECT_TIMEOUT,
+                read_timeout=HTTP_READ_TIMEOUT,
+                retries={'max_attempts': HTTP_RETRIES + 1, 'mode': 'standard'},
+                max_pool_connections=HTTP_POOL_SIZE,
+            ),
+        )
+    return s3
 
 def generate_url(key):
     try:
-        if (s3.head_object(Bucket=AWS_BUCKET_NAME, Key=key)):
-            url = s3.generate_presigned_url('get_object',
-                                        Params={'Bucket': AWS_BUCKET_NAME,
-                                                'Key': key},
-                                        ExpiresIn=604800)
-            return url
-        return None
+        url = get_client().generate_presigned_url('get_object',
+                                    Params={'Bucket': AWS_BUCKET_NAME,
+                                            'Key': key},
+                                    ExpiresIn=URL_EXPIRES_IN)
+        return url
     except Exception as e:
         print(e)
     return None
 
+
+def url_is_fresh(model, now):
+    if model.url is None or model.url_expires is None:
+        return False
+    return model.url_expires - URL_RENEW_MARGIN > now
+
+
+def get_files(models):
+    '''Presigned URLs for many rows. Only URLs close to expiry are reissued,
+    signing is local and all of them are saved in a single commit'''
+    now = datetime.utcnow()
+
+    with span('s3_get_files'):
+        stale = [model for model in models if not url_is_fresh(model, now)]
+        for model in stale:
+            model.url = generate_url(model.path)
+            model.url_expires = now + timedelta(seconds=URL_EXPIRES_IN) if model.url is not None else None
+
+        if len(stale) > 0:
+            db.session.commit()
+
+    return [model.url for model in models]
+
+
 def get_file(model):
-    if model.url is not None:
-        code = urlopen(model.url).getcode()
-        if code == 200:
-            return model.url
+    return get_files([model])[0]
 
-    url = generate_url(model.path)
-    model.url = url
-    db.session.commit()
 
-    return url
+def get_etag(key):
+    '''ETag of an object, the md5 of its content for single part uploads'''
+    return get_client().head_object(Bucket=AWS_BUCKET_NAME, Key=key)['ETag'].strip('"')
 
 
 def upload_file(folder, filename, path):
     try:
         obj_name = f"{folder}/{filename}"
 
-        s3.upload_file(path, AWS_BUCKET_NAME, obj_name)
+        with span('s3_upload'):
+            get_client().upload_file(path, AWS_BUCKET_NAME, obj_name)
+        S3_BYTES.labels('upload').inc(os.path.getsize(path))
 
         return obj_name
     except Exception as e:
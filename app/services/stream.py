@@ -0,0 +1,181 @@
+import os
+import json
+import time
+import queue
+import threading
+from datetime import timedelta
+
+from sqlalchemy import func
+
+from app.database import db, Report, ForecastHistory
+
+STREAM_POLL_INTERVAL = int(os.getenv('STREAM_POLL_INTERVAL', 10))
+# Seconds between comment lines on an idle stream, keeps proxies from closing it
+STREAM_KEEPALIVE = 15
+# Hours of history sent with each report, the client drops the points it has
+STREAM_BACKLOG = 25
+# Open streams per process, each one holds a gunicorn thread so the rest
+# are left to the other routes
+STREAM_MAX_SUBSCRIBERS = int(os.getenv('STREAM_MAX_SUBSCRIBERS', 8))
+
+broadcaster = None
+
+
+class Broadcaster:
+    '''One DB poller per process fanned out to every open stream of that
+    process, so a finished report costs one query per station and one
+    serialized event whatever the number of viewers'''
+
+    def __init__(self, app, interval, max_subscribers):
+        self.app = app
+        self.interval = interval
+        self.max_subscribers = max_subscribers
+        self.lock = threading.Lock()
+        self.subscribers = {}
+        self.last_ids = {}
+        self.thread = None
+
+    def subscribe(self, station, last_id):
+        '''Queue of the events of a station after report last_id, None when
+        the process already serves max_subscribers streams'''
+        events = queue.Queue(maxsize=16)
+        with self.lock:
+            if sum(len(subscribers) for subscribers in self.subscribers.values()) >= self.max_subscribers:
+                return None
+            if station not in self.subscribers:
+                self.subscribers[station] = set()
+                self.last_ids[station] = last_id
+            self.subscribers[station].add(events)
+
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.poll, name='forecast-stream', daemon=True)
+                self.thread.start()
+        return events
+
+    def unsubscribe(self, station, events):
+        with self.lock:
+            if station not in self.subscribers:
+                return
+            self.subscribers[station].discard(events)
+            if len(self.subscribers[station]) == 0:
+                del self.subscribers[station]
+                del self.last_ids[station]
+
+    def poll(self):
+        '''Runs for the life of the process, a failed round (e.g. a dropped DB
+        connection) is logged and retried on the next interval'''
+        while True:
+            time.sleep(self.interval)
+            with self.app.app_context():
+                try:
+                    self.publish()
+                except Exception as e:
+                    print('[stream]: poll failed', e)
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+
+    def publish(self):
+        with self.lock:
+            stations = dict(self.last_ids)
+
+        for station, last_id in stations.items():
+            report_id = last_report_id(station)
+            if report_id is None or report_id == last_id:
+                continue
+
+            event = format_event('forecast', forecast_delta(report_id))
+            with self.lock:
+                if station not in self.subscribers:
+                    continue
+                self.last_ids[station] = report_id
+                subscribers = list(self.subscribers[station])
+
+            for events in subscribers:
+                try:
+                    events.put_nowait(event)
+                except queue.Full:
+                    # A stalled client skips updates, its next event has the backlog
+                    pass
+
+
+class Stream:
+    '''text/event-stream body of one subscription. The WSGI server calls
+    close() when the client goes away, even if the body was never read'''
+
+    def __init__(self, broadcaster, station, events, first):
+        self.broadcaster = broadcaster
+        self.station = station
+        self.events = events
+        self.first = first
+
+    def __iter__(self):
+        if self.first is not None:
+            yield self.first
+        while True:
+            try:
+                yield self.events.get(timeout=STREAM_KEEPALIVE)
+            except queue.Empty:
+                yield ': keepalive\n\n'
+
+    def close(self):
+        self.broadcaster.unsubscribe(self.station, self.events)
+
+
+def get_broadcaster(app):
+    global broadcaster
+
+    if broadcaster is None:
+        broadcaster = Broadcaster(app, STREAM_POLL_INTERVAL, STREAM_MAX_SUBSCRIBERS)
+    return broadcaster
+
+
+def last_report_id(station):
+    return db.session.query(func.max(Report.id)) \
+        .filter((Report.station == station) & (Report.active == False) & (Report.horizon_start != None)).scalar()
+
+
+def forecast_delta(report_id):
+    '''Observations and forecasts of the hours before a report, in the units
+    of the dashboard history graph (Celsius, UTC-5)'''
+    report = db.session.query(Report).get(report_id)
+    history = db.session.query(ForecastHistory.date, ForecastHistory.air, ForecastHistory.forecast) \
+        .filter((ForecastHistory.station == report.station) &
+                (ForecastHistory.date >= report.horizon_start - timedelta(hours=STREAM_BACKLOG)) &
+                (ForecastHistory.date <= report.horizon_start)) \
+        .order_by(ForecastHistory.date).all()
+
+    observed = [(date, air) for date, air, _ in history if air is not None]
+    forecasts = [(date, forecast) for date, _, forecast in history if forecast is not None]
+    return {
+        'report': report.id,
+        'station': report.station,
+        'observed': trace_points(observed),
+        'forecast': trace_points(forecasts),
+    }
+
+
+def trace_points(points):
+    return {
+        'x': [(date - timedelta(hours=5)).isoformat() for date, _ in points],
+        'y': [value - 273.15 for _, value in points],
+    }
+
+
+def format_event(name, data):
+    return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+
+def events(station, app):
+    '''Stream of a station, starts with the last report so a page rendered
+    from cache catches up. None when the process is at STREAM_MAX_SUBSCRIBERS.
+    The queries run before streaming, an open stream holds no DB connection'''
+    broadcaster = get_broadcaster(app)
+
+    report_id = last_report_id(station)
+    first = format_event('forecast', forecast_delta(report_id)) if report_id is not None else None
+
+    subscription = broadcaster.subscribe(station, report_id)
+    if subscription is None:
+        return None
+    return Stream(broadcaster, station, subscription, first)
@@ -0,0 +1,91 @@
+import os
+
+import numpy as np
+
+from app.constants import TMP_DIR
+
+REPLAY_FILE = f"{TMP_DIR}/replay.npz"
+REPLAY_CAPACITY = int(os.getenv('REPLAY_CAPACITY', 4096))
+
+# Background training schedule of the worker, in seconds, and the new
+# windows needed before a round is worth running
+TRAIN_INTERVAL = int(os.getenv('TRAIN_INTERVAL', 6 * 3600))
+TRAIN_MIN_NEW = int(os.getenv('TRAIN_MIN_NEW', 24))
+TRAIN_EPOCHS = int(os.getenv('TRAIN_EPOCHS', 5))
+TRAIN_BATCH_SIZE = int(os.getenv('TRAIN_BATCH_SIZE', 32))
+# The most recent windows are held out to decide a promotion
+VALIDATION_FRACTION = 0.2
+MIN_VALIDATION = 8
+
+
+class ReplayBuffer:
+    '''Ring buffer of the last `capacity` scaled windows (time_steps inputs and
+    the observed next value) in preallocated float32 arrays'''
+
+    def __init__(self, capacity, time_steps):
+        self.X = np.zeros((capacity, time_steps), dtype=np.float32)
+        self.y = np.zeros(capacity, dtype=np.float32)
+        self.position = 0
+        self.size = 0
+        # Windows added since the last training round
+        self.new = 0
+
+    @property
+    def capacity(self):
+        return self.y.shape[0]
+
+    def add(self, X, y):
+        positions = (self.position + np.arange(X.shape[0])) % self.capacity
+        self.X[positions] = X
+        self.y[positions] = y
+        self.position = (self.position + X.shape[0]) % self.capacity
+        self.size = min(self.size + X.shape[0], self.capacity)
+        self.new += X.shape[0]
+
+    def arrays(self):
+        '''(X, y) of the stored windows, oldest first'''
+        if self.size < self.capacity:
+            return self.X[:self.size], self.y[:self.size]
+        order = np.roll(np.arange(self.capacity), -self.position)
+        return self.X[order], self.y[order]
+
+    def save(self, path):
+        X, y = self.arrays()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, X=X, y=y, new=self.new)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, capacity, time_steps):
+        buffer = cls(capacity, time_steps)
+        if os.path.exists(path):
+            with np.load(path) as data:
+                if data['X'].shape[1] == time_steps:
+                    buffer.add(data['X'][-capacity:], data['y'][-capacity:])
+                    buffer.new = int(data['new'])
+        return buffer
+
+
+def split(X, y):
+    '''Chronological train/validation split, the newest windows validate'''
+    size = max(MIN_VALIDATION, int(y.shape[0] * VALIDATION_FRACTION))
+    return (X[:-size], y[:-size]), (X[-size:], y[-size:])
+
+
+def validation_error(model, X, y):
+    '''MSE of a NumPy LSTMModel on scaled windows'''
+    y_score = model.predict(X[:, :, None])[:, 0]
+    return float(np.mean((y_score - y) ** 2))
+
+
+def fit_candidate(keras_model, X, y):
+    '''Copy of keras_model fine-tuned in mini-batches, the serving model is
+    left untouched until the candidate is promoted'''
+    import keras
+
+    candidate = keras.models.clone_model(keras_model)
+    candidate.set_weights(keras_model.get_weights())
+    candidate.compile(optimizer='adam', loss='mean_squared_error')
+    candidate.fit(X[:, :, None], y, batch_size=TRAIN_BATCH_SIZE, epochs=TRAIN_EPOCHS, shuffle=True, verbose=0)
+    return candidate
@@ -0,0 +1,39 @@
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+
+
+def sliding_windows(data, time_steps, horizon=1, target=0):
+    '''Zero-copy LSTM windows of a (length,) or (length, features) series.
+    Returns read-only views X (n, time_steps, features) and Y (n, horizon),
+    Y holding the next `horizon` values of the `target` feature'''
+    data = np.asarray(data)
+    if data.ndim == 1:
+        data = data[:, None]
+
+    n = max(data.shape[0] - time_steps - horizon + 1, 0)
+    row, column = data.strides
+    X = as_strided(data, shape=(n, time_steps, data.shape[1]), strides=(row, row, column), writeable=False)
+
+    targets = data[time_steps:, target]
+    Y = as_strided(targets, shape=(n, horizon), strides=(row, row), writeable=False)
+    return X, Y
+
+
+def stream_windows(chunks, time_steps, horizon=1, target=0):
+    '''sliding_windows over a series given in consecutive chunks, e.g. the
+    observation store read a month at a time. Only one chunk plus the
+    time_steps + horizon - 1 rows carried over is in memory at a time, every
+    window is yielded exactly once'''
+    overlap = time_steps + horizon - 1
+    tail = None
+    for chunk in chunks:
+        chunk = np.asarray(chunk)
+        if chunk.ndim == 1:
+            chunk = chunk[:, None]
+        data = chunk if tail is None else np.concatenate([tail, chunk])
+
+        X, Y = sliding_windows(data, time_steps, horizon, target)
+        if X.shape[0] > 0:
+            yield X, Y
+        tail = data[max(data.shape[0] - overlap, 0):].copy()
+
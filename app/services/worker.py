@@ -0,0 +1,86 @@
+import os
+import time
+import socket
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import IntegrityError
+
+from app.database import db, Report
+from app.constants import STATIONS
+from app.services.metrics import span
+
+POLL_INTERVAL = int(os.getenv('WORKER_POLL_INTERVAL', 10))
+CLAIM_TIMEOUT = timedelta(minutes=30)
+
+
+def enqueue():
+    '''Queue one forecast report per station for the worker. The unique
+    (station, hourly slot) index makes the insert itself the dedupe check, so
+    exactly one batch per hour is queued whatever the number of web workers
+    or replicas'''
+    slot = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+
+    reports = [Report(station=station, slot=slot) for station in STATIONS]
+    try:
+        db.session.add_all(reports)
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return 'skipped', db.session.query(Report).filter(Report.slot == slot).order_by(Report.id).all()
+
+    return 'sent', reports
+
+
+def claim_reports(worker_id):
+    '''Claim the reports of the oldest queued slot with a conditional UPDATE,
+    only one worker can win a row on both SQLite and Postgres. Claims older
+    than CLAIM_TIMEOUT belong to a dead worker and can be taken again'''
+    # Whole seconds, MySQL DATETIME drops the microseconds and the claimed
+    # rows are selected back by equality
+    now = datetime.utcnow().replace(microsecond=0)
+    claimable = (Report.active == True) & ((Report.claimed == None) | (Report.claimed < now - CLAIM_TIMEOUT))
+
+    while True:
+        oldest = db.session.query(Report.id, Report.slot).filter(claimable).order_by(Report.id).first()
+        if oldest is None:
+            db.session.commit()
+            return []
+
+        report_id, slot = oldest
+        batch = (Report.id == report_id) if slot is None else (Report.slot == slot)
+
+        claimed = db.session.query(Report).filter(batch & claimable) \
+            .update({"claimed": now, "worker": worker_id}, synchronize_session=False)
+        db.session.commit()
+
+        if claimed > 0:
+            report_ids = db.session.query(Report.id) \
+                .filter(batch & (Report.worker == worker_id) & (Report.claimed == now)).all()
+            return [report_id for report_id, in report_ids]
+
+
+def work(once=False):
+    '''Forecast worker loop, the model stays loaded between jobs. Training
+    rounds run every TRAIN_INTERVAL while the queue is empty, so they never
+    delay a forecast'''
+    from app.services.get_real_time_obs import job, retrain
+    from app.services.training import TRAIN_INTERVAL
+
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    print('[worker]: started', worker_id)
+
+    last_trained = time.monotonic()
+    while True:
+        report_ids = claim_reports(worker_id)
+        if len(report_ids) > 0:
+            print('[worker]: claimed reports', report_ids)
+            with span('job'):
+                job(report_ids)
+        elif once:
+            return
+        elif time.monotonic() - last_trained >= TRAIN_INTERVAL:
+            with span('retrain'):
+                retrain()
+            last_trained = time.monotonic()
+        else:
+            time.sleep(POLL_INTERVAL)
@@ -0,0 +1,47 @@
+'''Fires parallel /fetch calls at a local SQLite database and checks that
+exactly one report per station is queued for the hour.
+
+    python benchmarks/fetch_concurrency.py [--requests N]'''
+import os
+import sys
+import tempfile
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=32)
+    args = parser.parse_args()
+
+    db_file = os.path.join(tempfile.mkdtemp(), 'fetch.db')
+    os.environ['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{db_file}"
+    sys.path.insert(0, ROOT)
+
+    from app import create_app
+    from app.constants import STATIONS
+    from app.database import db, Report
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+
+    def fetch(_):
+        with app.test_client() as client:
+            return client.get('/fetch').get_json()['status']
+
+    with ThreadPoolExecutor(max_workers=args.requests) as executor:
+        statuses = list(executor.map(fetch, range(args.requests)))
+
+    with app.app_context():
+        reports = db.session.query(Report).count()
+
+    print(f"sent: {statuses.count('sent')}, skipped: {statuses.count('skipped')}, reports: {reports}")
+    if statuses.count('sent') != 1 or reports != len(STATIONS):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
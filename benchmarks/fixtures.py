@@ -0,0 +1,49 @@
+'''Synthetic METARs and ogimet pages shared by the benchmarks and the stub server'''
+import math
+import random
+import textwrap
+from datetime import datetime, timedelta
+
+
+def synthetic_metar(date, rng, station='SKBQ'):
+    # Daily cycle around 28 C
+    temperature = round(28 + 4 * math.sin((date.hour - 9) / 24 * 2 * math.pi) + rng.uniform(-1, 1))
+    return (
+        f"{station} {date.strftime('%d%H%M')}Z {rng.randint(0, 35):02d}0{rng.randint(2, 20):02d}KT "
+        f"9999 FEW0{rng.randint(10, 40)} {temperature:02d}/{temperature - rng.randint(2, 8):02d} "
+        f"Q{rng.randint(1005, 1015)} NOSIG"
+    )
+
+
+def synthetic_metars(size, start=datetime(2020, 1, 1), seed=0):
+    '''(timestamp, metar) tuples as extracted from an ogimet page'''
+    rng = random.Random(seed)
+    metars = []
+    for i in range(size):
+        date = start + timedelta(hours=i)
+        metars.append((date.strftime('%Y%m%d%H%M'), synthetic_metar(date, rng)))
+    return metars
+
+
+def ogimet_page(start, end, station='SKBQ', missing_hours=(), width=None):
+    '''fmt=txt page of ogimet display_metars2.php for the hours of [start, end],
+    records longer than `width` are wrapped'''
+    rng = random.Random(start.toordinal() * 24 + start.hour)
+    lines = []
+    date = start.replace(minute=0, second=0, microsecond=0)
+    while date <= end:
+        if date.hour not in missing_hours:
+            line = f"{date.strftime('%Y%m%d%H%M')} METAR {synthetic_metar(date, rng, station)}="
+            # Long reports continue on indented lines, like ogimet does
+            lines.append(line if width is None else textwrap.fill(line, width, subsequent_indent=' ' * 18))
+        date += timedelta(hours=1)
+
+    if len(lines) == 0:
+        body = f"No hay METAR/SPECI de {station} en el periodo solicitado"
+    else:
+        body = '\n'.join(lines)
+
+    return (
+        '<html><head><title>Ogimet</title><script>var x = 1;</script></head><body>\n'
+        f"<pre>\n# METAR/SPECI from {station}\n{body}\n</pre>\n</body></html>\n"
+    )
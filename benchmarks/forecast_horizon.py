@@ -0,0 +1,77 @@
+'''Latency of the multi-horizon forecast per horizon length.
+
+    python benchmarks/forecast_horizon.py [--batch N] [--repeat N]
+
+Uses a randomly initialised model with the production architecture
+(LSTM 100 -> LSTM 100 -> Dense 1, 4 time steps) and compares
+LSTMModel.rollout, which feeds each prediction back as one stateful step,
+with re-running the shifted 4 hour window for every step. --batch is the
+number of windows rolled out together (stations x scenarios).'''
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.lstm import LSTMModel
+
+TIME_STEPS = 4
+UNITS = 100
+
+
+def random_model(rng):
+    spec = [
+        {'type': 'lstm', 'units': UNITS, 'activation': 'tanh', 'recurrent_activation': 'sigmoid', 'return_sequences': True},
+        {'type': 'lstm', 'units': UNITS, 'activation': 'tanh', 'recurrent_activation': 'sigmoid', 'return_sequences': False},
+        {'type': 'dense', 'activation': 'linear'},
+    ]
+    weights = [
+        [rng.normal(0, 0.1, (1, 4 * UNITS)), rng.normal(0, 0.1, (UNITS, 4 * UNITS)), np.zeros(4 * UNITS)],
+        [rng.normal(0, 0.1, (UNITS, 4 * UNITS)), rng.normal(0, 0.1, (UNITS, 4 * UNITS)), np.zeros(4 * UNITS)],
+        [rng.normal(0, 0.1, (UNITS, 1)), np.zeros(1)],
+    ]
+    return LSTMModel(spec, weights)
+
+
+def window_rollout(model, X, horizon):
+    '''Recursive forecast that re-runs the whole window every step'''
+    steps = []
+    for _ in range(horizon):
+        y = model.predict(X)
+        steps.append(y)
+        X = np.concatenate([X[:, 1:], y[:, None, :]], axis=1)
+    return np.concatenate(steps, axis=1)
+
+
+def timed(fn, repeat, *args):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        times.append(time.perf_counter() - start)
+    return np.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--batch', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    model = random_model(rng)
+    X = rng.random((args.batch, TIME_STEPS, 1)).astype(np.float32)
+
+    print(f"batch {args.batch}, median of {args.repeat} runs")
+    print(f"{'horizon':>8} {'rollout':>12} {'window':>12}")
+    for horizon in [1, 6, 12, 24, 48]:
+        fast = timed(model.rollout, args.repeat, X, horizon)
+        slow = timed(window_rollout, args.repeat, model, X, horizon)
+        print(f"{horizon:>8} {fast * 1000:>9.2f} ms {slow * 1000:>9.2f} ms  ({slow / fast:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+'''Checks the shared HTTP layer against the local ogimet stub: connections
+opened by pooled requests against a fresh urlopen connection per call, the asyncio fan-out,
+retries under injected 503s, the read timeout on a hung server and the
+per-host concurrency limit.
+
+    python benchmarks/http_client.py [--requests N]'''
+import os
+import sys
+import time
+import argparse
+from datetime import datetime, timedelta
+from urllib.request import urlopen
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from ogimet_stub import serve, OgimetHandler
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    server, base_url = serve(0)
+    os.environ['OGIMET_URL'] = base_url
+
+    from app.services import http
+    from app.services.get_real_time_obs import station_url
+
+    end = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    url = station_url('SKBQ', end - timedelta(hours=24), end)
+    failed = False
+
+    for name, request in [('urlopen', lambda: urlopen(url).read()), ('pooled', lambda: http.get(url).content)]:
+        connections = OgimetHandler.connections
+        _, elapsed = timed(lambda: [request() for _ in range(args.requests)])
+        print(f"{name:<12} {args.requests} requests: {elapsed:.3f}s, {OgimetHandler.connections - connections} connections")
+
+    OgimetHandler.delay = 0.2
+    urls = [station_url(f"SK{i:02d}", end - timedelta(hours=24), end) for i in range(8)]
+    http.HTTP_HOST_CONCURRENCY = 8
+    _, elapsed = timed(lambda: http.get_all(urls))
+    print(f"fan-out      8 x 0.2s, limit 8: {elapsed:.3f}s")
+    http.host_limits.clear()
+    http.HTTP_HOST_CONCURRENCY = 2
+    _, elapsed = timed(lambda: http.get_all(urls))
+    print(f"fan-out      8 x 0.2s, limit 2: {elapsed:.3f}s")
+    failed |= elapsed < 0.8
+
+    OgimetHandler.delay = 0.0
+    OgimetHandler.failure_rate = 0.3
+    for retries in [0, 3]:
+        responses = http.get_all([url] * 50, retries)
+        ok = sum(not isinstance(response, Exception) for response in responses)
+        print(f"503 rate 0.3 retries {retries}: {ok}/50 ok")
+    OgimetHandler.failure_rate = 0.0
+
+    OgimetHandler.delay = 2.0
+    http.HTTP_READ_TIMEOUT = 0.5
+    responses, elapsed = timed(lambda: http.get_all([url], retries=1))
+    print(f"hung server  read timeout 0.5s, 1 retry: {type(responses[0]).__name__} after {elapsed:.3f}s")
+    failed |= not isinstance(responses[0], Exception) or elapsed > 2.0
+
+    server.shutdown()
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
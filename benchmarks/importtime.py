@@ -0,0 +1,55 @@
+'''Startup benchmark: import time of a module measured with python -X importtime.
+
+    python benchmarks/importtime.py [module] [--budget MS] [--top N]
+
+Exits with status 1 when the total is above the budget, so regressions in the
+app import path are visible in CI.'''
+import os
+import sys
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def importtime(module):
+    '''Returns (total self time in us, [(self us, top level package)])'''
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+        cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    total = 0
+    packages = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, package = line[len('import time:'):].split('|')
+        total += int(self_us)
+        package = package.strip().split('.')[0]
+        packages[package] = packages.get(package, 0) + int(self_us)
+    return total, sorted(((us, package) for package, us in packages.items()), reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('module', nargs='?', default='wsgi')
+    parser.add_argument('--budget', type=float, default=None, help='budget in ms')
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+
+    total, packages = importtime(args.module)
+
+    print(f"import {args.module}: {total / 1000:.1f} ms")
+    for self_us, package in packages[:args.top]:
+        print(f"{self_us / 1000:10.1f} ms  {package}")
+
+    if args.budget is not None and total / 1000 > args.budget:
+        print(f"over budget: {total / 1000:.1f} ms > {args.budget:.1f} ms")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
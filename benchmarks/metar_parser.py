@@ -0,0 +1,59 @@
+'''Benchmark of the METAR parsers over a synthetic backfill-sized batch.
+
+    python benchmarks/metar_parser.py [--size N]
+
+Compares Metar.Metar(...).string() plus the temperature regex, the path used
+before app.services.metar_parser, with parse_batch.'''
+import os
+import re
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.metar_parser import parse_batch
+from fixtures import synthetic_metars
+
+
+def metar_string_path(metars):
+    from metar import Metar
+
+    temperatures = []
+    failures = 0
+    for _, metar in metars:
+        try:
+            obs = Metar.Metar(metar).string()
+            temperatures.append(float(re.findall(r".*temperature:\s(.*)[\s]C\s*", obs)[0]))
+        except Exception:
+            failures += 1
+    return temperatures, failures
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size', type=int, default=24 * 90)
+    args = parser.parse_args()
+
+    metars = synthetic_metars(args.size)
+    print(f"{args.size} METARs")
+
+    fast = timed(parse_batch, metars)
+    print(f"parse_batch:              {fast * 1000:9.1f} ms")
+
+    try:
+        slow = timed(metar_string_path, metars)
+    except ImportError:
+        print('Metar.Metar().string():   metar package not installed')
+        return
+    print(f"Metar.Metar().string():   {slow * 1000:9.1f} ms  ({slow / fast:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
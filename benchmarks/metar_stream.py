@@ -0,0 +1,93 @@
+'''Benchmark of the METAR extraction from ogimet fmt=txt pages.
+
+    python benchmarks/metar_stream.py [--days 1,30,365]
+
+Compares the BeautifulSoup path used before app.services.metar_stream
+(html.parser tree, script/style stripped, get_text, whitespace collapsed,
+regex) with stream_metars over 64 KiB chunks of the page, on pages with wrapped
+records. Prints the time and the peak memory traced while extracting,
+and checks that both extract the same METARs.'''
+import os
+import re
+import sys
+import time
+import argparse
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.metar_stream import stream_metars
+from fixtures import ogimet_page
+
+
+def soup_path(page, station='SKBQ'):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(page, features='html.parser')
+    for script in soup(["script", "style"]):
+        script.extract()
+    text = soup.get_text()
+    if f"No hay METAR/SPECI de {station} en el periodo solicitado" in text:
+        return []
+    text = re.sub(r'\s\s+', ' ', text)
+    return re.findall(r"\s(\d+)[\s]METAR\s(.*)=", text)
+
+
+def stream_path(page, chunk_size=64 * 1024):
+    # Bytes chunks, as iter_content of the response yields them
+    return stream_metars(page[i:i + chunk_size] for i in range(0, len(page), chunk_size))
+
+
+def measure(fn, page):
+    '''METARs, best time of 3 and peak memory of the extraction alone, the
+    METARs are counted and dropped like a streaming consumer would'''
+    metars = list(fn(page))
+    elapsed = min(timed(lambda: list(fn(page))) for _ in range(3))
+
+    tracemalloc.start()
+    for _ in fn(page):
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return metars, elapsed, peak
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--days', default='1,30,365')
+    args = parser.parse_args()
+
+    start = datetime(2020, 1, 1)
+    for days in [int(days) for days in args.days.split(',')]:
+        page = ogimet_page(start, start + timedelta(days=days) - timedelta(hours=1), width=60).encode('utf8')
+        print(f"{days} days, {len(page) / 1024:.0f} KiB page")
+
+        metars, elapsed, peak = measure(stream_path, page)
+        print(f"  stream_metars:  {elapsed * 1000:9.1f} ms  peak {peak / 1024:9.0f} KiB  {len(metars)} METARs")
+
+        try:
+            soup_metars, soup_elapsed, soup_peak = measure(soup_path, page)
+        except ImportError:
+            print('  BeautifulSoup:  bs4 not installed')
+            continue
+        print(f"  BeautifulSoup:  {soup_elapsed * 1000:9.1f} ms  peak {soup_peak / 1024:9.0f} KiB  ({soup_elapsed / elapsed:.1f}x, {soup_peak / peak:.1f}x memory)")
+
+        if soup_metars != metars:
+            print('  METARs differ')
+            sys.exit(1)
+
+    empty = ogimet_page(start, start - timedelta(hours=1)).encode('utf8')
+    if list(stream_path(empty)) != []:
+        print('sentinel page not empty')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
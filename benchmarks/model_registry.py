@@ -0,0 +1,103 @@
+'''Load time and predict latency of the model registry artifact.
+
+    python benchmarks/model_registry.py [--repeat N] [--batch N]
+
+Uses a randomly initialised model with the production architecture and
+compares keras.models.load_model on the h5 file (skipped without keras),
+load_weights on the NumPy npz export used before the registry and
+unpack_weights on packed float32 and float16 artifacts. Prints the file
+sizes, the forecast error float16 weights add, in Kelvin, and the latency
+of one window and of --batch windows.'''
+import os
+import sys
+import time
+import tempfile
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.lstm import Scaler, save_weights, load_weights, pack_weights, unpack_weights
+from forecast_horizon import random_model, TIME_STEPS
+
+
+def timed(fn, repeat, *args):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        times.append(time.perf_counter() - start)
+    return np.median(times)
+
+
+def keras_model_file(model, path):
+    '''The same weights as a keras h5 file, None without keras'''
+    try:
+        import keras
+        from keras.layers import LSTM, Dense
+    except ImportError:
+        return None
+
+    keras_model = keras.Sequential([
+        keras.Input((TIME_STEPS, 1)),
+        LSTM(model.spec[0]['units'], return_sequences=True),
+        LSTM(model.spec[1]['units']),
+        Dense(1),
+    ])
+    keras_model.set_weights([w for layer in model.weights for w in layer])
+    keras_model.save(path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--batch', type=int, default=64)
+    args = parser.parse_args()
+
+    model = random_model(np.random.default_rng(0))
+    scaler = Scaler([1 / 20.], [-290 / 20.])
+    directory = tempfile.mkdtemp()
+
+    files = {
+        'npz': f"{directory}/model.npz",
+        'packed float32': f"{directory}/model-float32.bin",
+        'packed float16': f"{directory}/model-float16.bin",
+    }
+    save_weights(files['npz'], model, scaler)
+    pack_weights(files['packed float32'], model, scaler, 'float32')
+    pack_weights(files['packed float16'], model, scaler, 'float16')
+    h5_file = keras_model_file(model, f"{directory}/model.h5")
+
+    print('load')
+    if h5_file is not None:
+        import keras
+        elapsed = timed(lambda: keras.models.load_model(h5_file, compile=False), max(args.repeat // 10, 1))
+        print(f"  keras h5:        {elapsed * 1000:9.2f} ms  {os.path.getsize(h5_file) / 1024:7.0f} KiB")
+    else:
+        print('  keras h5:        keras not installed')
+    for name, loader in [('npz', load_weights), ('packed float32', unpack_weights), ('packed float16', unpack_weights)]:
+        elapsed = timed(loader, args.repeat, files[name])
+        print(f"  {name + ':':<16} {elapsed * 1000:9.2f} ms  {os.path.getsize(files[name]) / 1024:7.0f} KiB")
+
+    full, _ = unpack_weights(files['packed float32'])
+    half, _ = unpack_weights(files['packed float16'])
+    X = scaler.transform(np.random.default_rng(1).uniform(295, 305, (1024, TIME_STEPS, 1))).astype(np.float32)
+    error = np.abs(scaler.inverse_transform(full.predict(X)) - scaler.inverse_transform(half.predict(X))).max()
+    print(f"float16 max abs forecast error: {error:.2e} K")
+
+    print(f"predict, 1 window / {args.batch} windows")
+    if h5_file is not None:
+        keras_model = keras.models.load_model(h5_file, compile=False)
+        single = timed(lambda: keras_model.predict(X[:1], verbose=0), args.repeat)
+        batch = timed(lambda: keras_model.predict(X[:args.batch], verbose=0), args.repeat)
+        print(f"  keras:           {single * 1000:9.2f} ms  {batch * 1000:9.2f} ms")
+    for name, numpy_model in [('packed float32', full), ('packed float16', half)]:
+        single = timed(numpy_model.predict, args.repeat, X[:1])
+        batch = timed(numpy_model.predict, args.repeat, X[:args.batch])
+        print(f"  {name + ':':<16} {single * 1000:9.2f} ms  {batch * 1000:9.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
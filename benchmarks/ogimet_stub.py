@@ -0,0 +1,106 @@
+'''Local stand-in for ogimet display_metars2.php serving synthetic pages.
+
+    python benchmarks/ogimet_stub.py [--port 8787] [--failure-rate 0.1] [--delay 0]
+
+Then point the app at it with
+OGIMET_URL=http://127.0.0.1:8787/display_metars2.php'''
+import os
+import sys
+import time
+import random
+import argparse
+from datetime import datetime
+from threading import Thread
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fixtures import ogimet_page
+
+
+def requested_range(query):
+    value = lambda key: int(query[key][0])
+    start = datetime(value('ano'), value('mes'), value('day'), value('hora'))
+    end = datetime(value('anof'), value('mesf'), value('dayf'), value('horaf'))
+    return start, min(end, datetime.utcnow())
+
+
+class OgimetHandler(BaseHTTPRequestHandler):
+    # Keep-alive, like the real server
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    failure_rate = 0.0
+    # Seconds slept before answering, to exercise client timeouts
+    delay = 0.0
+    # Hours of the day without a METAR, to exercise fix_gaps
+    missing_hours = ()
+    requests = 0
+    connections = 0
+
+    def setup(self):
+        OgimetHandler.connections += 1
+        super().setup()
+
+    def do_GET(self):
+        OgimetHandler.requests += 1
+        url = urlparse(self.path)
+
+        if url.path != '/display_metars2.php':
+            self.send_error(404)
+            return
+        if self.delay > 0:
+            time.sleep(self.delay)
+        if random.random() < self.failure_rate:
+            self.send_error(503)
+            return
+
+        query = parse_qs(url.query)
+        start, end = requested_range(query)
+        page = ogimet_page(start, end, query['lugar'][0], self.missing_hours).encode('utf8')
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(page)))
+        self.end_headers()
+        try:
+            self.wfile.write(page)
+        except ConnectionError:
+            # The client timed out on a delayed answer
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port=0, failure_rate=0.0, delay=0.0, background=True, missing_hours=()):
+    '''Bind the stub and, with background, serve it from a daemon thread.
+    Returns (server, base url)'''
+    OgimetHandler.failure_rate = failure_rate
+    OgimetHandler.delay = delay
+    OgimetHandler.missing_hours = missing_hours
+    server = ThreadingHTTPServer(('127.0.0.1', port), OgimetHandler)
+    if background:
+        Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/display_metars2.php"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--port', type=int, default=8787)
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    parser.add_argument('--delay', type=float, default=0.0)
+    args = parser.parse_args()
+
+    server, url = serve(args.port, args.failure_rate, args.delay, background=False)
+    print(f"OGIMET_URL={url}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
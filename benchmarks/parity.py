@@ -0,0 +1,111 @@
+'''Checks that the NumPy models the app serves predict like keras and that
+Scaler transforms like the sklearn MinMaxScaler, without a database or S3.
+
+    python benchmarks/parity.py [--samples N] [--atol X]
+
+Builds a keras model with the production architecture (LSTM 100 -> Dropout
+-> LSTM 100 -> Dense 1, 4 time steps) for both recurrent activations keras
+has saved models with, and a MinMaxScaler fitted on Kelvin temperatures.
+They are exported like load_model() does (h5 and joblib files read by
+LSTMModel.from_h5, save_weights and load_weights) and like the registry does
+(pack_weights and unpack_weights in float32 and float16). Each reloaded
+model predicts scaled windows next to keras, float16 artifacts next to a
+keras copy with its weights rounded to float16. Exits 1 when a difference
+is above --atol. Needs keras and sklearn.'''
+import os
+import sys
+import tempfile
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.lstm import LSTMModel, Scaler, save_weights, load_weights, pack_weights, unpack_weights
+
+# Max absolute difference allowed with keras and sklearn, on scaled values
+PARITY_ATOL = 1e-5
+TIME_STEPS = 4
+UNITS = 100
+
+
+def keras_model(recurrent_activation, rng):
+    import keras
+    from keras.layers import LSTM, Dense, Dropout
+
+    model = keras.Sequential([
+        keras.Input((TIME_STEPS, 1)),
+        LSTM(UNITS, recurrent_activation=recurrent_activation, return_sequences=True),
+        Dropout(0.2),
+        LSTM(UNITS, recurrent_activation=recurrent_activation),
+        Dense(1),
+    ])
+    # Non zero biases, so a wrong gate order or activation shows
+    model.set_weights([rng.normal(0, 0.2, w.shape).astype(np.float32) for w in model.get_weights()])
+    return model
+
+
+def scaler_error(scaler, reference, kelvin):
+    '''Max difference of transform (scaled) and inverse_transform (Kelvin
+    divided by the scale, so both compare on the scaled range)'''
+    scaled = reference.transform(kelvin)
+    return max(
+        np.abs(scaler.transform(kelvin) - scaled).max(),
+        np.abs((scaler.inverse_transform(scaled) - reference.inverse_transform(scaled)) * reference.scale_).max(),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--samples', type=int, default=256)
+    parser.add_argument('--atol', type=float, default=PARITY_ATOL)
+    args = parser.parse_args()
+
+    import joblib
+    from sklearn.preprocessing import MinMaxScaler
+
+    rng = np.random.default_rng(0)
+    directory = tempfile.mkdtemp()
+
+    reference_scaler = MinMaxScaler().fit(rng.uniform(290, 308, (1000, 1)))
+    scaler_file = f"{directory}/scaler.save"
+    joblib.dump(reference_scaler, scaler_file)
+    kelvin = rng.uniform(285, 312, (args.samples * TIME_STEPS, 1))
+    X = reference_scaler.transform(kelvin).reshape(args.samples, TIME_STEPS, 1).astype(np.float32)
+
+    errors = [('Scaler.from_sklearn', scaler_error(Scaler.from_sklearn(joblib.load(scaler_file)), reference_scaler, kelvin))]
+    for recurrent_activation in ['hard_sigmoid', 'sigmoid']:
+        reference = keras_model(recurrent_activation, rng)
+        model_file = f"{directory}/model-{recurrent_activation}.h5"
+        reference.save(model_file)
+        expected = reference.predict(X)
+
+        # load_model(): h5 and scaler file to the npz weights it serves
+        model = LSTMModel.from_h5(model_file)
+        weights_file = f"{directory}/model-{recurrent_activation}.npz"
+        save_weights(weights_file, model, Scaler.from_sklearn(joblib.load(scaler_file)))
+        served, served_scaler = load_weights(weights_file)
+        errors.append((f"{recurrent_activation} from_h5", np.abs(model.predict(X) - expected).max()))
+        errors.append((f"{recurrent_activation} npz", np.abs(served.predict(X) - expected).max()))
+        errors.append((f"{recurrent_activation} npz scaler", scaler_error(served_scaler, reference_scaler, kelvin)))
+
+        for dtype in ['float32', 'float16']:
+            packed_file = f"{directory}/model-{recurrent_activation}-{dtype}.bin"
+            pack_weights(packed_file, model, served_scaler, dtype)
+            packed, packed_scaler = unpack_weights(packed_file)
+            if dtype != 'float32':
+                reference.set_weights([w.astype(dtype).astype(np.float32) for w in reference.get_weights()])
+                expected = reference.predict(X)
+            errors.append((f"{recurrent_activation} packed {dtype}", np.abs(packed.predict(X) - expected).max()))
+            errors.append((f"{recurrent_activation} packed {dtype} scaler", scaler_error(packed_scaler, reference_scaler, kelvin)))
+
+    failures = [name for name, error in errors if not error <= args.atol]
+    for name, error in errors:
+        print(f"  {name + ':':<36} {error:.2e}  {'FAILED' if name in failures else 'ok'}")
+    print(f"max abs error {max(error for _, error in errors):.2e}, tolerance {args.atol:.0e}")
+    if len(failures) > 0:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
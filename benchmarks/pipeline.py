@@ -0,0 +1,214 @@
+'''End-to-end benchmark of the hourly forecast job on offline fixtures:
+synthetic ogimet pages served by ogimet_stub, a temporary SQLite database,
+a local archive directory standing in for S3 and a model with the
+production architecture and random weights, registered like a promoted
+version. The working directory is a temporary one, so the replay buffer
+and the artifact cache are too.
+
+    python manager.py bench [--repeat N] [--fit]
+    python benchmarks/pipeline.py [--repeat N] [--fit]
+
+Runs job() itself for 1, 4 and 16 stations, each run on new stations like
+a fresh worker, and times the stages it reports to span(): load_model,
+sync_observations and its ogimet_fanout, get_observations, fix_gaps,
+replay, rollout, archive_write, store_history and commit. Prints p50/p95
+per stage and the peak traced memory of one extra job, then the report
+queries of the dashboard, the API and /fetch dedupe at 1k, 10k and 100k
+reports. --fit adds the mini-batch training round on the replay buffer the
+jobs filled, it needs keras.'''
+import os
+import sys
+import time
+import tempfile
+import argparse
+import tracemalloc
+import resource
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+STATION_SCALES = [1, 4, 16]
+REPORT_SCALES = [1000, 10000, 100000]
+
+
+class Stages:
+    '''Wall time of every run of a stage and the peak of the memory
+    allocated by Python and NumPy in traced runs'''
+
+    def __init__(self):
+        self.times = defaultdict(list)
+        self.peaks = {}
+        self.trace = False
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            # Tracing slows the run down, only its peak is kept
+            if not self.trace:
+                self.times[name].append(time.perf_counter() - start)
+
+    @contextmanager
+    def traced(self, name):
+        self.trace = True
+        tracemalloc.start()
+        try:
+            yield
+        finally:
+            self.peaks[name] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            self.trace = False
+
+    def report(self, title):
+        print(f"\n{title}")
+        print(f"  {'stage':<24} {'p50':>10} {'p95':>10} {'peak memory':>12}")
+        for name, times in self.times.items():
+            p50, p95 = np.percentile(times, [50, 95]) * 1000
+            peak = f"{self.peaks[name] / 1024 / 1024:>9.2f} MB" if name in self.peaks else ''
+            print(f"  {name:<24} {p50:>7.2f} ms {p95:>7.2f} ms {peak:>12}")
+
+
+def register_model():
+    '''Random model as registry version 1, its artifact left in the local
+    cache like publish_artifact does, so loading it never reaches S3'''
+    from app.database import db, ModelData
+    from app.services.artifacts import ARTIFACTS_DIR, artifact_path, file_hash
+    from app.services.lstm import Scaler, pack_weights
+    from app.services.registry import MODEL_NAME, MODEL_DTYPE
+    from forecast_horizon import random_model
+
+    os.makedirs(ARTIFACTS_DIR, exist_ok=True)
+    path = f"{ARTIFACTS_DIR}/model.bin"
+    pack_weights(path, random_model(np.random.default_rng(0)), Scaler([1 / 20], [-290 / 20]), MODEL_DTYPE)
+
+    entry = ModelData(path=f"models/{MODEL_NAME}/v1.bin", name=MODEL_NAME, version=1, etag=file_hash(path))
+    os.replace(path, artifact_path(entry))
+    db.session.add(entry)
+    db.session.commit()
+
+
+def run_job(g, stations):
+    '''One job() over a report per station, like the worker runs it'''
+    from app.database import db, Report
+
+    reports = [Report(station=station) for station in stations]
+    db.session.add_all(reports)
+    db.session.commit()
+    report_ids = [report.id for report in reports]
+
+    # Every run starts like a fresh worker, so the model is loaded too
+    g.model = None
+    g.job(report_ids)
+
+    failed = db.session.query(Report.station).filter(Report.id.in_(report_ids) & (Report.forecast == None)).all()
+    if len(failed) > 0:
+        raise RuntimeError(f"no forecast for {[station for station, in failed]}")
+
+
+def bench_job(app, repeat, fit):
+    from app.services import get_real_time_obs as g
+
+    station_id = 0
+    with app.app_context():
+        register_model()
+        for stations in STATION_SCALES:
+            stages = Stages()
+            # job() reports its stages to span(), time them here instead
+            g.span = stages.stage
+            for run in range(repeat + 1):
+                names = [f"B{station_id + i:04d}" for i in range(stations)]
+                station_id += stations
+                if run < repeat:
+                    with stages.stage('job'):
+                        run_job(g, names)
+                else:
+                    with stages.traced('job'):
+                        run_job(g, names)
+
+            if fit:
+                from app.services.training import fit_candidate
+                X, y = g.get_replay().arrays()
+                for _ in range(repeat):
+                    with stages.stage('fit (training round)'):
+                        fit_candidate(keras_model(), X, y)
+            stages.report(f"{stations} stations per job, {repeat} runs")
+
+
+def keras_model():
+    import keras
+
+    model = keras.Sequential([
+        keras.layers.LSTM(100, return_sequences=True, input_shape=(4, 1)),
+        keras.layers.Dropout(0.2),
+        keras.layers.LSTM(100),
+        keras.layers.Dropout(0.2),
+        keras.layers.Dense(1),
+    ])
+    model.compile(optimizer='adam', loss='mean_squared_error')
+    return model
+
+
+def bench_queries(app, repeat):
+    from sqlalchemy import func
+    from app.database import db, Report, ModelData, Counter
+    from report_queries import seed, queries
+
+    with app.app_context():
+        for reports in REPORT_SCALES:
+            db.session.remove()
+            db.drop_all()
+            db.create_all()
+            slot = seed(db, Report, ModelData, Counter, reports)
+
+            stages = Stages()
+            for name, query in queries(db, func, Report, ModelData, slot).items():
+                for _ in range(repeat):
+                    with stages.stage(name):
+                        query()
+            stages.report(f"{reports} reports, {repeat} runs")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--fit', action='store_true', help='time a training round, needs keras')
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp()
+    # TMP_DIR is relative to the working directory
+    os.chdir(tmp_dir)
+    from ogimet_stub import serve
+    # Two unreported hours in the middle of the job's window for fix_gaps to
+    # impute, the last window stays observed and goes into the replay buffer
+    hour = datetime.utcnow().hour
+    server, url = serve(missing_hours=((hour + 11) % 24, (hour + 12) % 24))
+    os.environ['OGIMET_URL'] = url
+    os.environ['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_dir}/bench.db"
+    os.environ['ARCHIVE_URL'] = f"{tmp_dir}/archive"
+    sys.path.insert(0, ROOT)
+
+    from app import create_app
+    from app.constants import MIGRATION_ENV
+    from app.database import db
+
+    app = create_app(env=MIGRATION_ENV)
+    with app.app_context():
+        db.create_all()
+
+    bench_job(app, args.repeat, args.fit)
+    bench_queries(app, args.repeat)
+
+    # ru_maxrss is in KB on Linux
+    print(f"\nmax RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
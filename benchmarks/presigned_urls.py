@@ -0,0 +1,79 @@
+'''Checks that get_files() reuses presigned URLs that are still fresh
+without any S3 call and reissues only the ones close to expiry, against a
+temporary SQLite database and a stub S3 client that counts its calls.
+
+    python benchmarks/presigned_urls.py'''
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class StubClient:
+    '''Signs with a counter, any other S3 call fails the check'''
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate_presigned_url(self, method, Params, ExpiresIn):
+        self.calls += 1
+        return f"https://stub/{Params['Key']}?signature={self.calls}"
+
+    def head_object(self, **kwargs):
+        raise AssertionError('head_object called')
+
+
+def main():
+    db_file = os.path.join(tempfile.mkdtemp(), 'urls.db')
+    os.environ['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{db_file}"
+    sys.path.insert(0, ROOT)
+
+    from app import create_app
+    from app.database import db, ModelData
+    from app.services import s3
+
+    client = StubClient()
+    s3.s3 = client
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        now = datetime.utcnow()
+        fresh = [ModelData(path=f"data/fresh-{i}", url=f"https://old/fresh-{i}", url_expires=now + s3.URL_RENEW_MARGIN + timedelta(hours=1)) for i in range(3)]
+        expiring = [ModelData(path=f"data/expiring-{i}", url=f"https://old/expiring-{i}", url_expires=now + s3.URL_RENEW_MARGIN - timedelta(hours=1)) for i in range(2)]
+        unsigned = [ModelData(path='data/unsigned')]
+        db.session.add_all(fresh + expiring + unsigned)
+        db.session.commit()
+
+        failures = []
+        urls = s3.get_files(fresh)
+        if client.calls != 0 or urls != [f"https://old/fresh-{i}" for i in range(3)]:
+            failures.append(f"fresh URLs: {client.calls} calls, {urls}")
+
+        urls = s3.get_files(fresh + expiring + unsigned)
+        stale = expiring + unsigned
+        if client.calls != len(stale):
+            failures.append(f"mixed URLs: {client.calls} calls for {len(stale)} stale rows")
+        if urls[:3] != [f"https://old/fresh-{i}" for i in range(3)]:
+            failures.append(f"fresh URLs reissued: {urls[:3]}")
+        if any(not url.startswith('https://stub/') for url in urls[3:]):
+            failures.append(f"stale URLs kept: {urls[3:]}")
+        if any(model.url_expires - now < timedelta(seconds=s3.URL_EXPIRES_IN) - timedelta(minutes=1) for model in stale):
+            failures.append('reissued URLs without a new expiry')
+
+        calls = client.calls
+        s3.get_files(fresh + expiring + unsigned)
+        if client.calls != calls:
+            failures.append(f"reissued URLs signed again: {client.calls - calls} calls")
+
+    print(f"S3 calls: {client.calls}, expected {len(stale)}")
+    for failure in failures:
+        print('FAILED:', failure)
+    if len(failures) > 0:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
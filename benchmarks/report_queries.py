@@ -0,0 +1,114 @@
+'''Times the hot Report and ModelData queries on a SQLite database seeded
+with --reports rows, without and with the indexes of 4f7a2c9e8b15 and the
+model registry index of d5e9a3c7f1b2.
+
+    python benchmarks/report_queries.py [--reports N] [--repeat N]
+
+The model version check is the query every job runs against the registry.'''
+import os
+import sys
+import time
+import tempfile
+import argparse
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STATIONS = ['SKBQ', 'SKCG', 'SKSM']
+QUEUED = 3
+MODEL_VERSIONS = 50
+
+NEW_INDEXES = ['ix_report_slot_station', 'ix_report_active_id', 'ix_report_station_active_id', 'ix_report_updated', 'ix_model_data_path', 'ix_model_data_name_version']
+
+
+def seed(db, Report, ModelData, Counter, reports):
+    start = datetime(2010, 1, 1)
+    rows = []
+    for i in range(reports):
+        slot = start + timedelta(hours=i // len(STATIONS))
+        active = i >= reports - QUEUED
+        rows.append({
+            'station': STATIONS[i % len(STATIONS)],
+            'slot': slot,
+            'active': active,
+            'forecast': None if active else 300.0,
+            'path': None if active else f"reports/{slot:%Y%m%d%H}.csv",
+            'horizon_start': None if active else slot + timedelta(hours=1),
+            'created': slot,
+            'updated': slot,
+        })
+    db.session.execute(Report.__table__.insert(), rows)
+    db.session.execute(ModelData.__table__.insert(), [{'path': path} for path in ['data/model.h5', 'data/scaler.save', 'data/train_data.csv']] +
+                       [{'path': f"models/forecast/v{version}.bin", 'name': 'forecast', 'version': version} for version in range(1, MODEL_VERSIONS + 1)])
+    db.session.execute(Counter.__table__.insert(), [{'name': 'model_version', 'value': MODEL_VERSIONS}])
+    db.session.commit()
+    return rows[-1]['slot']
+
+
+def queries(db, func, Report, ModelData, slot):
+    station = STATIONS[0]
+    finished = (Report.active == False) & (Report.path != None)
+    claimable = (Report.active == True) & (Report.claimed == None)
+
+    return {
+        'enqueue skipped (slot)': lambda: db.session.query(Report).filter(Report.slot == slot).order_by(Report.id).all(),
+        'claim oldest queued': lambda: db.session.query(Report.id, Report.slot).filter(claimable).order_by(Report.id).first(),
+        'dashboard cache key': lambda: db.session.query(func.max(Report.id)).filter((Report.station == station) & finished).scalar(),
+        'last report of station': lambda: db.session.query(Report).filter((Report.station == station) & finished).order_by(Report.id.desc()).first(),
+        'api etag MAX(updated)': lambda: db.session.query(func.max(Report.updated)).scalar(),
+        'model version check': lambda: db.session.query(func.max(ModelData.version)).filter(ModelData.name == 'forecast').scalar(),
+        'model data by path': lambda: db.session.query(ModelData).filter(ModelData.path == 'data/model.h5').first(),
+    }
+
+
+def timed(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return sorted(times)[len(times) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--reports', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    db_file = os.path.join(tempfile.mkdtemp(), 'reports.db')
+    os.environ['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{db_file}"
+    sys.path.insert(0, ROOT)
+
+    from sqlalchemy import func
+    from app import create_app
+    from app.constants import MIGRATION_ENV
+    from app.database import db, Report, ModelData, Counter
+
+    app = create_app(env=MIGRATION_ENV)
+    with app.app_context():
+        db.create_all()
+        for index in NEW_INDEXES:
+            db.session.execute(f"DROP INDEX {index}")
+        db.session.execute('CREATE UNIQUE INDEX ix_report_station_slot ON report (station, slot)')
+        slot = seed(db, Report, ModelData, Counter, args.reports)
+        print(f"{args.reports} reports, median of {args.repeat} runs")
+
+        before = {name: timed(query, args.repeat) for name, query in queries(db, func, Report, ModelData, slot).items()}
+
+        db.session.execute('DROP INDEX ix_report_station_slot')
+        for index in Report.__table__.indexes | ModelData.__table__.indexes:
+            if index.name in NEW_INDEXES:
+                index.create(db.engine)
+        db.session.execute('ANALYZE')
+        db.session.commit()
+
+        after = {name: timed(query, args.repeat) for name, query in queries(db, func, Report, ModelData, slot).items()}
+
+    print(f"{'query':<26} {'before':>10} {'after':>10}")
+    for name in before:
+        print(f"{name:<26} {before[name] * 1000:>7.3f} ms {after[name] * 1000:>7.3f} ms  ({before[name] / after[name]:.0f}x)")
+
+
+if __name__ == '__main__':
+    main()
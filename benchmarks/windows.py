@@ -0,0 +1,63 @@
+'''Micro-benchmark of the LSTM window builders.
+
+    python benchmarks/windows.py [--time-steps N]
+
+Compares the Python loop create_dataset used before app.services.windows
+with sliding_windows (zero-copy views, then np.ascontiguousarray for the
+cost of a real copy) on series of 10k, 100k and 1M hours. Peak memory is
+measured with tracemalloc.'''
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.windows import sliding_windows
+
+
+def loop_dataset(dataset, time_steps):
+    X, Y = [], []
+    for i in range(dataset.shape[0] - time_steps):
+        X.append(dataset[i:(i + time_steps), 0])
+        Y.append(dataset[i + time_steps, 0])
+    return np.array(X), np.array(Y)
+
+
+def view_dataset(dataset, time_steps):
+    return sliding_windows(dataset[:, 0], time_steps)
+
+
+def copy_dataset(dataset, time_steps):
+    X, Y = sliding_windows(dataset[:, 0], time_steps)
+    return np.ascontiguousarray(X), np.ascontiguousarray(Y)
+
+
+def measure(fn, dataset, time_steps):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn(dataset, time_steps)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--time-steps', type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"{'hours':>9} {'builder':<16} {'time':>10} {'peak memory':>12}")
+    for size in [10000, 100000, 1000000]:
+        dataset = np.random.rand(size, 1)
+        for name, fn in [('create_dataset', loop_dataset), ('sliding view', view_dataset), ('sliding copy', copy_dataset)]:
+            elapsed, peak = measure(fn, dataset, args.time_steps)
+            print(f"{size:>9} {name:<16} {elapsed * 1000:>7.2f} ms {peak / 1024 / 1024:>9.2f} MB")
+
+
+if __name__ == '__main__':
+    main()
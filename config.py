@@ -8,3 +8,6 @@ class Config:
     SECRET_KEY = os.getenv('SECRET_KEY')
     SQLALCHEMY_DATABASE_URI = os.getenv('SQLALCHEMY_DATABASE_URI')
     SQLALCHEMY_TRACK_MODIFICATIONS = os.getenv('SQLALCHEMY_TRACK_MODIFICATIONS')
+    DASHBOARD_CACHE_SIZE = int(os.getenv('DASHBOARD_CACHE_SIZE', 8))
+    DASHBOARD_CACHE_PATH = os.getenv('DASHBOARD_CACHE_PATH')
+    COMPRESS_ALGORITHM = ['br', 'gzip']
@@ -11,5 +11,138 @@ manager = Manager(app)
 manager.add_command('db', MigrateCommand)
 
 
+@manager.option('--once', dest='once', action='store_true', help='exit when the queue is empty')
+def worker(once=False):
+    """Run the queued forecast reports"""
+    from app.services.worker import work
+
+    work(once=once)
+
+
+@manager.option('--from', dest='start', required=True, help='YYYY-mm-dd')
+@manager.option('--to', dest='end', required=True, help='YYYY-mm-dd')
+@manager.option('--concurrency', dest='concurrency', type=int, default=4)
+@manager.option('--rate', dest='rate', type=float, default=1.0, help='ogimet requests per second')
+@manager.option('--stations', dest='stations', default=None, help='comma separated ICAO codes, STATIONS by default')
+def backfill(start, end, concurrency=4, rate=1.0, stations=None):
+    """Load the METARs of a date range into the observation store"""
+    from datetime import datetime
+    from app.constants import STATIONS
+    from app.services.backfill import backfill as run_backfill
+
+    stations = STATIONS if stations is None else stations.split(',')
+    stored, failed = run_backfill(stations, datetime.strptime(start, '%Y-%m-%d'), datetime.strptime(end, '%Y-%m-%d'), concurrency, rate)
+    print('observations stored:', stored, 'failed days:', len(failed))
+
+
+@manager.option('--from', dest='start', required=True, help='YYYY-mm-dd')
+@manager.option('--to', dest='end', required=True, help='YYYY-mm-dd')
+@manager.option('--stations', dest='stations', default=None, help='comma separated ICAO codes, STATIONS by default')
+def replay(start, end, stations=None):
+    """Seed the replay buffer with the stored observations of a date range"""
+    from datetime import datetime
+    from app.constants import STATIONS
+    from app.services.get_real_time_obs import seed_replay
+
+    stations = STATIONS if stations is None else stations.split(',')
+    print('windows added:', seed_replay(stations, datetime.strptime(start, '%Y-%m-%d'), datetime.strptime(end, '%Y-%m-%d')))
+
+
+@manager.command
+def train():
+    """Run one training round on the replay buffer"""
+    from app.services.get_real_time_obs import retrain
+
+    print('promoted:', retrain())
+
+
+@manager.command
+def register():
+    """Publish the model built from the keras and scaler files as the next registry version"""
+    from app.services.registry import register as register_model
+    from app.services.get_real_time_obs import load_model, increment_counter
+
+    model, scaler = load_model()
+    entry = register_model(increment_counter('model_version'), model, scaler)
+    print('registered version:', None if entry is None else entry.version)
+
+
+@manager.option('--repeat', dest='repeat', default='10')
+@manager.option('--fit', dest='fit', action='store_true', help='time a training round, needs keras')
+def bench(repeat='10', fit=False):
+    """Benchmark every stage of the forecast pipeline on offline fixtures"""
+    import sys
+    import subprocess
+
+    # A separate process, the benchmark sets up its own temporary database
+    command = [sys.executable, 'benchmarks/pipeline.py', '--repeat', repeat] + (['--fit'] if fit else [])
+    subprocess.run(command, check=True)
+
+
+@manager.command
+def parity():
+    """Check the exported NumPy model and scaler against keras and sklearn"""
+    import sys
+    import subprocess
+
+    # Self-contained, builds its own keras model and scaler
+    sys.exit(subprocess.run([sys.executable, 'benchmarks/parity.py']).returncode)
+
+
+@manager.command
+def history():
+    """Fill the forecast history table from the finished reports"""
+    import io
+    import pandas as pd
+    from app.database import db, Report
+    from app.services.s3 import get_files
+    from app.services.http import get
+    from app.services.archive import read_report
+    from app.services.get_real_time_obs import store_history
+
+    reports = db.session.query(Report).filter((Report.active == False) & (Report.path != None)).order_by(Report.id).all()
+    csv_reports = [report for report in reports if report.path.endswith('.csv')]
+    urls = dict(zip([report.id for report in csv_reports], get_files(csv_reports)))
+
+    for report in reports:
+        if report.id in urls:
+            df = pd.read_csv(io.BytesIO(get(urls[report.id]).content), parse_dates=['date'])
+        else:
+            df = read_report(report)
+        store_history(df, report.forecast, report.id, report.station)
+        db.session.commit()
+
+    print('reports loaded:', len(reports))
+
+
+@manager.option('--station', dest='station', default=None, help='ICAO code, every station by default')
+def compact(station=None):
+    """Merge the hourly fragments of the Parquet report archive"""
+    from app.services.archive import compact as run_compact
+
+    print('fragments merged:', run_compact(station))
+
+
+@manager.command
+def archive():
+    """Copy the finished report CSVs on S3 into the Parquet report archive"""
+    import io
+    import pandas as pd
+    from datetime import timedelta
+    from app.database import db, Report
+    from app.services.s3 import get_files
+    from app.services.http import get
+    from app.services.archive import append_report, compact as run_compact
+
+    reports = db.session.query(Report).filter((Report.active == False) & Report.path.like('%.csv')).order_by(Report.id).all()
+    for report, url in zip(reports, get_files(reports)):
+        df = pd.read_csv(io.BytesIO(get(url).content), parse_dates=['date'])
+        report.path = append_report(df, report.forecast, report.id, report.station)
+        report.horizon_start = report.horizon_start or df['date'].iloc[-1].to_pydatetime() + timedelta(hours=1)
+        db.session.commit()
+
+    print('reports archived:', len(reports), 'fragments merged:', run_compact())
+
+
 if __name__ == '__main__':
-    manager.run()
\ No newline at end of file
+    manager.run()
@@ -0,0 +1,30 @@
+"""Report path partition
+
+Revision ID: 6e2c9b4d8a15
+Revises: a3f6c8d2b9e7
+Create Date: 2026-10-19 14:12:05.418230
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6e2c9b4d8a15'
+down_revision = 'a3f6c8d2b9e7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Archived reports point at their station/month partition, the hourly
+    # fragments are deleted when the partition is compacted
+    bind = op.get_bind()
+    reports = bind.execute(sa.text("SELECT id, path FROM report WHERE path LIKE '%.parquet'")).fetchall()
+    for report_id, path in reports:
+        bind.execute(sa.text("UPDATE report SET path = :path WHERE id = :id"), path=path.rsplit('/', 1)[0], id=report_id)
+
+
+def downgrade():
+    # The fragment names are not kept, partitions are valid report paths
+    pass
@@ -0,0 +1,28 @@
+"""Drop fits counter
+
+Revision ID: a3f6c8d2b9e7
+Revises: d5e9a3c7f1b2
+Create Date: 2026-10-19 09:41:17.302958
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3f6c8d2b9e7'
+down_revision = 'd5e9a3c7f1b2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Retraining runs on the replay buffer schedule, nothing counts fits
+    op.execute("DELETE FROM counter WHERE name = 'fits'")
+
+
+def downgrade():
+    fits = op.get_bind().execute(
+        sa.text("SELECT COUNT(*) FROM report WHERE active = :active AND station = 'SKBQ'"), active=False
+    ).scalar()
+    op.execute(sa.text("INSERT INTO counter (name, value) VALUES ('fits', :value)").bindparams(value=fits))